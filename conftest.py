@@ -0,0 +1,10 @@
+from django.test.utils import override_settings
+
+
+def pytest_configure(config):
+    """Run the queued tasks inline like the test runner of the project.
+
+    Set once for the session, so the settings overridden by the tests
+    and the data of ``setUpTestData`` see it too.
+    """
+    override_settings(TASKS_MODE="eager").enable()
@@ -0,0 +1,78 @@
+"""Representation of the models in the API responses.
+
+A representation maps the names of the fields to functions reading
+them from the object; the clients may ask for a part of the fields.
+"""
+
+from operator import attrgetter
+
+
+class FieldsError(ValueError):
+    """The requested fields are not fields of the resource."""
+
+
+def _isoformat(name):
+    return lambda obj: getattr(obj, name).isoformat()
+
+
+POST = {
+    "id": attrgetter("pk"),
+    "text": attrgetter("text"),
+    "pub_date": _isoformat("pub_date"),
+    "author": attrgetter("author.username"),
+    "group": lambda post: post.group.slug if post.group else None,
+    "image": lambda post: post.image.url if post.image else None,
+}
+
+POST_DETAIL = {**POST, "comments_count": attrgetter("comments_count")}
+
+GROUP = {
+    "id": attrgetter("pk"),
+    "title": attrgetter("title"),
+    "slug": attrgetter("slug"),
+    "description": attrgetter("description"),
+}
+
+GROUP_DETAIL = {**GROUP, "posts_count": attrgetter("posts_count")}
+
+COMMENT = {
+    "id": attrgetter("pk"),
+    "post": attrgetter("post_id"),
+    "author": attrgetter("author.username"),
+    "text": attrgetter("text"),
+    "created": _isoformat("created"),
+}
+
+PROFILE = {
+    "username": attrgetter("username"),
+    "first_name": attrgetter("first_name"),
+    "last_name": attrgetter("last_name"),
+    "posts_count": attrgetter("profile.posts_count"),
+    "followers_count": attrgetter("profile.followers_count"),
+    "following_count": attrgetter("profile.following_count"),
+    "following": attrgetter("is_followed"),
+}
+
+FOLLOW = {
+    "id": attrgetter("pk"),
+    "author": attrgetter("author.username"),
+}
+
+
+def fields_of(representation, requested):
+    """Return the requested fields, all fields when none are requested.
+
+    ``requested`` is the value of the ``fields`` parameter, the names
+    separated by commas.
+    """
+    if not requested:
+        return list(representation)
+    fields = [field.strip() for field in requested.split(",")]
+    unknown = [field for field in fields if field not in representation]
+    if unknown:
+        raise FieldsError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def serialize(obj, representation, fields):
+    return {field: representation[field](obj) for field in fields}
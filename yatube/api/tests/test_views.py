@@ -0,0 +1,176 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core import tasks
+from core.testing import BudgetTestMixin
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(BudgetTestMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for number in range(settings.API_PAGE_SIZE + 1):
+            cls.post = Post.objects.create(
+                text=f"Пост {number}", author=cls.author, group=cls.group
+            )
+        Comment.objects.create(
+            text="Комментарий", author=cls.user, post=cls.post
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(ApiTests.user)
+
+    def test_endpoints_within_budget(self):
+        """The endpoints answer JSON within the budgets of the views."""
+        urls = (
+            reverse("api:posts"),
+            reverse("api:post", args=(self.post.id,)),
+            reverse("api:comments", args=(self.post.id,)),
+            reverse("api:groups"),
+            reverse("api:group", args=(self.group.slug,)),
+            reverse("api:group_posts", args=(self.group.slug,)),
+            reverse("api:profile", args=(self.author.username,)),
+            reverse("api:profile_posts", args=(self.author.username,)),
+            reverse("api:follow"),
+            reverse("api:follows"),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertWithinBudget(response)
+
+    def test_post_detail(self):
+        """The post is represented with its comments count."""
+        response = self.client.get(reverse("api:post", args=(self.post.id,)))
+        self.assertEqual(
+            response.json(),
+            {
+                "id": self.post.id,
+                "text": self.post.text,
+                "pub_date": self.post.pub_date.isoformat(),
+                "author": self.author.username,
+                "group": self.group.slug,
+                "image": None,
+                "comments_count": 1,
+            },
+        )
+
+    def test_cursor_pagination(self):
+        """The next links walk through all posts, the latest first."""
+        url = reverse("api:posts")
+        ids = []
+        while url:
+            data = self.client.get(url).json()
+            ids += [post["id"] for post in data["results"]]
+            url = data["next"]
+        self.assertEqual(
+            ids,
+            list(
+                Post.objects.order_by("-pub_date", "-id").values_list(
+                    "id", flat=True
+                )
+            ),
+        )
+
+    def test_field_selection(self):
+        """Only the requested fields are returned, unknown ones fail."""
+        url = reverse("api:posts")
+        data = self.client.get(url, {"fields": "id,author"}).json()
+        self.assertEqual(
+            data["results"][0], {"id": self.post.id, "author": "Author"}
+        )
+        response = self.client.get(url, {"fields": "id,password"})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertEqual(
+            response.json(), {"detail": "Unknown fields: password"}
+        )
+
+    def test_errors(self):
+        """Missing objects, anonymous users and writes get JSON errors."""
+        response = self.client.get(reverse("api:post", args=(0,)))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertEqual(response.json(), {"detail": "Not found."})
+        response = self.client.get(reverse("api:follow"))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+        response = self.client.post(reverse("api:posts"))
+        self.assertEqual(response.status_code, HTTPStatus.METHOD_NOT_ALLOWED)
+
+    def test_not_modified(self):
+        """An unchanged resource is answered with 304 without queries."""
+        url = reverse("api:group_posts", args=(self.group.slug,))
+        response = self.client.get(url)
+        self.assertIn("no-cache", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_writes_change_etag(self):
+        """A new post or comment changes the ETag of the resources."""
+        urls = (
+            reverse("api:posts"),
+            reverse("api:group_posts", args=(self.group.slug,)),
+            reverse("api:profile_posts", args=(self.author.username,)),
+            reverse("api:post", args=(self.post.id,)),
+            reverse("api:comments", args=(self.post.id,)),
+        )
+        etags = [self.client.get(url)["ETag"] for url in urls]
+        Post.objects.create(
+            text="Новый пост", author=self.author, group=self.group
+        )
+        Comment.objects.create(text="Новый", author=self.user, post=self.post)
+        for url, etag in zip(urls, etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(TASKS_MODE="worker")
+    def test_fan_out_changes_follow_etag(self):
+        """The follow feed validated before the fan-out is stale after it."""
+        url = reverse("api:follow")
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        etag = self.authorized_client.get(url)["ETag"]
+        tasks.run_pending()
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()["results"][0]["id"], post.id)
+
+    def test_etag_per_user(self):
+        """Users get their own ETags and private responses."""
+        url = reverse("api:profile", args=(self.author.username,))
+        anonymous = self.client.get(url)
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=anonymous["ETag"]
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.json()["following"])
+        self.assertIn("private", response["Cache-Control"])
+        Follow.objects.filter(user=self.user).delete()
+        response = self.authorized_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertFalse(response.json()["following"])
@@ -0,0 +1,185 @@
+"""Read-only JSON API over the posts, groups, comments and follows.
+
+The lists are paginated by the opaque ``cursor`` parameter and every
+resource may be narrowed by the ``fields`` parameter. The responses
+carry the validators of the feed cache generations, so a client polling
+an unchanged resource gets 304 without the resource being read.
+"""
+
+from functools import wraps
+from http import HTTPStatus
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from api import serializers
+from api.serializers import FieldsError, fields_of, serialize
+from posts import feeds, graph
+from posts.cache import (
+    AUTHOR,
+    GROUP,
+    GROUPS,
+    POST,
+    POSTS,
+    conditional,
+    post_detail_scopes,
+)
+from posts.models import Follow, Group, Post, User
+from posts.utils import (
+    COMMENT_ORDERING,
+    POST_ORDERING,
+    TIMELINE_ORDERING,
+    CursorPaginator,
+)
+
+
+def respond(data, status=HTTPStatus.OK):
+    return JsonResponse(
+        data, status=status, json_dumps_params={"ensure_ascii": False}
+    )
+
+
+def error(status, detail):
+    return respond({"detail": detail}, status=status)
+
+
+def api_view(*scopes, login_required=False):
+    """Serve a resource answering 304 while the scopes keep generations.
+
+    Missing objects and unknown fields are answered with JSON errors.
+    """
+
+    def decorator(view):
+        @require_safe
+        @conditional(*scopes)
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if login_required and not request.user.is_authenticated:
+                return error(
+                    HTTPStatus.UNAUTHORIZED, "Authentication is required."
+                )
+            try:
+                return view(request, *args, **kwargs)
+            except Http404:
+                return error(HTTPStatus.NOT_FOUND, "Not found.")
+            except FieldsError as exc:
+                return error(HTTPStatus.BAD_REQUEST, str(exc))
+
+        return wrapper
+
+    return decorator
+
+
+def _cursor_url(request, cursor):
+    if cursor is None:
+        return None
+    params = request.GET.copy()
+    params["cursor"] = cursor
+    return request.build_absolute_uri(f"?{params.urlencode()}")
+
+
+def page(request, object_list, representation, ordering):
+    """Page of the objects following the cursor of the request."""
+    fields = fields_of(representation, request.GET.get("fields"))
+    paginator = CursorPaginator(object_list, settings.API_PAGE_SIZE, ordering)
+    page_obj = paginator.cursor_page(request.GET.get("cursor"))
+    return respond(
+        {
+            "results": [
+                serialize(obj, representation, fields) for obj in page_obj
+            ],
+            "next": _cursor_url(request, paginator.next_cursor),
+            "previous": _cursor_url(request, paginator.previous_cursor),
+        }
+    )
+
+
+def detail(request, obj, representation):
+    fields = fields_of(representation, request.GET.get("fields"))
+    return respond(serialize(obj, representation, fields))
+
+
+@api_view(POSTS)
+def posts(request):
+    """All posts, the latest first."""
+    return page(request, feeds.latest(), serializers.POST, POST_ORDERING)
+
+
+@api_view(post_detail_scopes)
+def post(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related("group", "author"), pk=post_id
+    )
+    return detail(request, post, serializers.POST_DETAIL)
+
+
+@api_view(POST)
+def comments(request, post_id):
+    """Comments to the post, the oldest first."""
+    post = get_object_or_404(Post, pk=post_id)
+    return page(
+        request,
+        post.comments.select_related("author"),
+        serializers.COMMENT,
+        COMMENT_ORDERING,
+    )
+
+
+@api_view(GROUPS)
+def groups(request):
+    return page(request, Group.objects.all(), serializers.GROUP, ("id",))
+
+
+@api_view(GROUP)
+def group(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return detail(request, group, serializers.GROUP_DETAIL)
+
+
+@api_view(GROUP)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return page(
+        request, feeds.of_group(group), serializers.POST, POST_ORDERING
+    )
+
+
+@api_view(AUTHOR)
+def profile(request, username):
+    author = get_object_or_404(
+        User.objects.select_related("profile"), username=username
+    )
+    author.is_followed = graph.is_following(request.user, author)
+    return detail(request, author, serializers.PROFILE)
+
+
+@api_view(AUTHOR)
+def profile_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    return page(
+        request, feeds.of_author(author), serializers.POST, POST_ORDERING
+    )
+
+
+@api_view(POSTS, login_required=True)
+def follow(request):
+    """Posts of the authors followed by the user."""
+    return page(
+        request,
+        feeds.of_followed(request.user),
+        serializers.POST,
+        TIMELINE_ORDERING,
+    )
+
+
+@api_view(login_required=True)
+def follows(request):
+    """Authors followed by the user."""
+    return page(
+        request,
+        Follow.objects.filter(user=request.user).select_related("author"),
+        serializers.FOLLOW,
+        ("id",),
+    )
@@ -0,0 +1,21 @@
+"""Admin site settings of the 'Core' application."""
+
+from django.contrib import admin
+
+from core.models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Table settings for resource 'Task' on the admin site."""
+
+    list_display = (
+        "pk",
+        "name",
+        "args",
+        "status",
+        "attempts",
+        "run_at",
+    )
+    list_filter = ("status", "name")
+    readonly_fields = ("name", "args", "key", "last_error", "created")
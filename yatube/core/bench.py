@@ -0,0 +1,52 @@
+"""Helpers of the benchmark commands."""
+
+import math
+
+
+def percentile(values, percent):
+    """Return the percentile of the values by the nearest-rank method."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[max(rank, 1) - 1]
+
+
+def summary(latencies):
+    """Return the latency percentiles in milliseconds."""
+    return {
+        "requests": len(latencies),
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Return the regressions of the results against the baseline.
+
+    A scenario regresses when its p95 latency grows or its throughput
+    drops by more than ``tolerance`` percent, or when it runs more
+    queries per request.
+    """
+    regressions = []
+    margin = tolerance / 100
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result["p95"] > previous["p95"] * (1 + margin):
+            regressions.append(
+                f"{name}: p95 {previous['p95']:.2f}ms -> {result['p95']:.2f}ms"
+            )
+        if result["throughput"] < previous["throughput"] * (1 - margin):
+            regressions.append(
+                f"{name}: throughput {previous['throughput']:.1f}/s -> "
+                f"{result['throughput']:.1f}/s"
+            )
+        if result["queries"] > previous["queries"]:
+            regressions.append(
+                f"{name}: queries {previous['queries']:.1f} -> "
+                f"{result['queries']:.1f}"
+            )
+    return regressions
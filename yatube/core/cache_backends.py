@@ -0,0 +1,194 @@
+"""Cache backends shared by the worker processes."""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+)
+"""
+
+
+class SQLiteCache(BaseCache):
+    """Cache stored in a SQLite file in WAL mode.
+
+    Unlike ``LocMemCache`` the entries are visible to every process on
+    the host, so the workers warm one cache together. ``LOCATION`` is
+    the path of the file, it is created on the first use.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.path = location
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        row = self.connection.execute(
+            "SELECT value FROM cache "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        if row is None:
+            return default
+        return pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        keys = {self._key(key, version): key for key in keys}
+        if not keys:
+            return {}
+        placeholders = ", ".join("?" * len(keys))
+        rows = self.connection.execute(
+            f"SELECT key, value FROM cache WHERE key IN ({placeholders}) "
+            "AND (expires IS NULL OR expires > ?)",
+            (*keys, time.time()),
+        )
+        return {keys[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._write(
+            "INSERT OR REPLACE INTO cache (key, value, expires) "
+            "VALUES (?, ?, ?)",
+            key,
+            value,
+            timeout,
+            version,
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (
+                self._key(key, version),
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                expires,
+            )
+            for key, value in data.items()
+        ]
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires) "
+                "VALUES (?, ?, ?)",
+                rows,
+            )
+            self._cull(connection)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._write(
+            "INSERT OR IGNORE INTO cache (key, value, expires) "
+            "VALUES (?, ?, ?)",
+            key,
+            value,
+            timeout,
+            version,
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self.connection.execute(
+            "UPDATE cache SET expires = ? "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (
+                self.get_backend_timeout(timeout),
+                self._key(key, version),
+                time.time(),
+            ),
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key, version=None):
+        self.connection.execute(
+            "DELETE FROM cache WHERE key = ?", (self._key(key, version),)
+        )
+
+    def has_key(self, key, version=None):
+        row = self.connection.execute(
+            "SELECT 1 FROM cache "
+            "WHERE key = ? AND (expires IS NULL OR expires > ?)",
+            (self._key(key, version), time.time()),
+        ).fetchone()
+        return row is not None
+
+    def clear(self):
+        self.connection.execute("DELETE FROM cache")
+
+    def _write(self, query, key, value, timeout, version):
+        """Store the value in one transaction with the expiry cleanup.
+
+        Return whether the row was written.
+        """
+        key = self._key(key, version)
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?",
+                (key, time.time()),
+            )
+            cursor = connection.execute(
+                query,
+                (
+                    key,
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                    self.get_backend_timeout(timeout),
+                ),
+            )
+            self._cull(connection)
+        return cursor.rowcount == 1
+
+    @contextmanager
+    def _transaction(self):
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _cull(self, connection):
+        (entries,) = connection.execute(
+            "SELECT COUNT(*) FROM cache"
+        ).fetchone()
+        if entries <= self._max_entries:
+            return
+        connection.execute(
+            "DELETE FROM cache WHERE expires <= ?", (time.time(),)
+        )
+        if self._cull_frequency == 0:
+            connection.execute("DELETE FROM cache")
+            return
+        connection.execute(
+            "DELETE FROM cache WHERE key IN "
+            "(SELECT key FROM cache ORDER BY rowid LIMIT ?)",
+            (entries // self._cull_frequency,),
+        )
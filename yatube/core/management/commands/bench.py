@@ -0,0 +1,250 @@
+"""Benchmark the feed, detail and write paths on generated data."""
+
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import (
+    override_settings,
+    setup_databases,
+    teardown_databases,
+)
+from django.urls import reverse
+from mixer.backend.django import mixer
+
+from core import tasks
+from core.bench import compare, summary
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+SCENARIOS = (
+    "index",
+    "group_posts",
+    "profile",
+    "post_detail",
+    "follow_index",
+    "post_create",
+    "add_comment",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a test database with users, groups, posts, follows and "
+        "comments, request the pages with concurrent clients and report "
+        "the throughput, latency and queries per request of each page."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--groups", type=int, default=5)
+        parser.add_argument("--posts", type=int, default=500)
+        parser.add_argument(
+            "--follows", type=int, default=10, help="Follows per user."
+        )
+        parser.add_argument("--comments", type=int, default=1000)
+        parser.add_argument("--clients", type=int, default=4)
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Requests per page."
+        )
+        parser.add_argument(
+            "--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Run without the cache, every request reads the database.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--baseline",
+            default=os.path.join(settings.BASE_DIR, "bench_baseline.json"),
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Store the results as the new baseline.",
+        )
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=20,
+            help="Allowed change of latency and throughput, percent.",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail when a page regresses against the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        directory = tempfile.mkdtemp()
+        connection.settings_dict["TEST"]["NAME"] = os.path.join(
+            directory, "bench.sqlite3"
+        )
+        # The emails about new comments are kept in memory, not written
+        # to the files of the project during the write scenarios
+        overrides = {
+            "DEBUG": False,
+            "THUMBNAIL_ASYNC": False,
+            "EMAIL_BACKEND": "django.core.mail.backends.locmem.EmailBackend",
+        }
+        if options["cold"]:
+            overrides["CACHES"] = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                }
+            }
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            with override_settings(**overrides):
+                try:
+                    rng = random.Random(options["seed"])
+                    data = self.seed(rng, options)
+                    results = {
+                        name: self.run(name, data, options)
+                        for name in options["scenarios"]
+                    }
+                finally:
+                    # The queued tasks write to the database dropped below
+                    # and send their emails with the settings of the bench
+                    tasks.wait()
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            shutil.rmtree(directory, ignore_errors=True)
+        self.report(results, options)
+
+    def seed(self, rng, options):
+        """Create the data through the models, so the signals run."""
+        users = mixer.cycle(options["users"]).blend(
+            User, username=mixer.sequence("user{0}")
+        )
+        groups = mixer.cycle(options["groups"]).blend(
+            Group, slug=mixer.sequence("group{0}")
+        )
+        for user in users:
+            authors = [author for author in users if author != user]
+            for author in rng.sample(
+                authors, min(options["follows"], len(authors))
+            ):
+                mixer.blend(Follow, user=user, author=author)
+        posts = mixer.cycle(options["posts"]).blend(
+            Post,
+            author=(rng.choice(users) for _ in range(options["posts"])),
+            group=(rng.choice(groups) for _ in range(options["posts"])),
+            image="",
+        )
+        mixer.cycle(options["comments"]).blend(
+            Comment,
+            author=(rng.choice(users) for _ in range(options["comments"])),
+            post=(rng.choice(posts) for _ in range(options["comments"])),
+        )
+        return {"users": users, "groups": groups, "posts": posts}
+
+    def run(self, name, data, options):
+        """Send the requests of the scenario from concurrent clients."""
+        scenario = getattr(self, f"request_{name}")
+        per_client = max(options["requests"] // options["clients"], 1)
+
+        def client_run(number):
+            rng = random.Random(f"{options['seed']}:{name}:{number}")
+            client = Client()
+            client.force_login(rng.choice(data["users"]))
+            measures = []
+            try:
+                for _ in range(per_client):
+                    start = time.perf_counter()
+                    response = scenario(client, rng, data)
+                    measures.append(
+                        (
+                            time.perf_counter() - start,
+                            response.metrics.queries,
+                            response.status_code < 400,
+                        )
+                    )
+            finally:
+                connections.close_all()
+            return measures
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(options["clients"]) as executor:
+            measures = sum(
+                executor.map(client_run, range(options["clients"])), []
+            )
+        elapsed = time.perf_counter() - start
+        latencies, queries, succeeded = zip(*measures)
+        return {
+            **summary(latencies),
+            "throughput": len(measures) / elapsed,
+            "queries": sum(queries) / len(measures),
+            "errors": succeeded.count(False),
+        }
+
+    def request_index(self, client, rng, data):
+        return client.get(reverse("posts:index"))
+
+    def request_group_posts(self, client, rng, data):
+        group = rng.choice(data["groups"])
+        return client.get(reverse("posts:group_list", args=(group.slug,)))
+
+    def request_profile(self, client, rng, data):
+        user = rng.choice(data["users"])
+        return client.get(reverse("posts:profile", args=(user.username,)))
+
+    def request_post_detail(self, client, rng, data):
+        post = rng.choice(data["posts"])
+        return client.get(reverse("posts:post_detail", args=(post.id,)))
+
+    def request_follow_index(self, client, rng, data):
+        return client.get(reverse("posts:follow_index"))
+
+    def request_post_create(self, client, rng, data):
+        group = rng.choice(data["groups"])
+        return client.post(
+            reverse("posts:post_create"),
+            {"text": "Пост нагрузочного теста", "group": group.id},
+        )
+
+    def request_add_comment(self, client, rng, data):
+        post = rng.choice(data["posts"])
+        return client.post(
+            reverse("posts:add_comment", args=(post.id,)),
+            {"text": "Комментарий нагрузочного теста"},
+        )
+
+    def report(self, results, options):
+        baseline = {}
+        if os.path.exists(options["baseline"]):
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+        for name, result in results.items():
+            line = (
+                f"{name:>13}: {result['throughput']:8.1f} req/s "
+                f"p50={result['p50']:.2f}ms p95={result['p95']:.2f}ms "
+                f"p99={result['p99']:.2f}ms "
+                f"queries={result['queries']:.1f} "
+                f"errors={result['errors']}"
+            )
+            if name in baseline:
+                change = result["p95"] / baseline[name]["p95"] - 1
+                line += f" (p95 {change:+.0%} to baseline)"
+            self.stdout.write(line)
+        regressions = compare(results, baseline, options["tolerance"])
+        for regression in regressions:
+            self.stderr.write(f"Regression: {regression}")
+        if options["save_baseline"]:
+            with open(options["baseline"], "w") as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f"Baseline saved to {options['baseline']}")
+        if options["check"] and regressions:
+            raise CommandError(f"{len(regressions)} regressions")
@@ -0,0 +1,172 @@
+"""Compare the WSGI and ASGI serving of the read pages with slow clients."""
+
+import asyncio
+import random
+import time
+from io import BytesIO
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.asgi import WSGIToASGI
+from core.bench import summary
+from posts.models import Follow, Group, Post, User
+
+MODES = ("wsgi", "asgi")
+
+
+class Command(BaseCommand):
+    help = (
+        "Request the feed and detail pages with many concurrent slow "
+        "clients, served once by a pool of WSGI worker threads and once "
+        "by the ASGI adapter with a pool of the same size, and report "
+        "the throughput and latency of both."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=200)
+        parser.add_argument(
+            "--requests", type=int, default=10, help="Requests per client."
+        )
+        parser.add_argument(
+            "--threads", type=int, default=settings.ASGI_THREADS
+        )
+        parser.add_argument(
+            "--client-delay",
+            type=float,
+            default=0.05,
+            help="Seconds a client takes to send the request and to read "
+            "the response.",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Run without the cache, every request reads the database.",
+        )
+        parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+
+    def handle(self, *args, **options):
+        follower = Follow.objects.values_list("user", flat=True).first()
+        if follower is None or not Post.objects.exists():
+            raise CommandError("No posts to read, run generate_data first")
+        client = Client()
+        client.force_login(User.objects.get(pk=follower))
+        self.cookie = (
+            f"{settings.SESSION_COOKIE_NAME}="
+            f"{client.cookies[settings.SESSION_COOKIE_NAME].value}"
+        )
+        self.paths = self.read_paths()
+        self.wsgi_application = get_wsgi_application()
+        caches = settings.CACHES
+        if options["cold"]:
+            caches = {
+                "default": {
+                    "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+                }
+            }
+        with override_settings(CACHES=caches):
+            for mode in options["modes"]:
+                latencies, elapsed = asyncio.run(self.run(mode, options))
+                stats = summary(latencies)
+                self.stdout.write(
+                    f"{mode}: {stats['requests'] / elapsed:8.1f} req/s "
+                    f"p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms "
+                    f"p99={stats['p99']:.2f}ms"
+                )
+
+    def read_paths(self):
+        usernames = list(User.objects.values_list("username", flat=True)[:100])
+        slugs = list(Group.objects.values_list("slug", flat=True)[:20])
+        post_ids = list(Post.objects.values_list("id", flat=True)[:1000])
+        paths = [reverse("posts:index"), reverse("posts:follow_index")]
+        paths += [reverse("posts:profile", args=(name,)) for name in usernames]
+        paths += [reverse("posts:group_list", args=(slug,)) for slug in slugs]
+        paths += [
+            reverse("posts:post_detail", args=(post_id,))
+            for post_id in post_ids
+        ]
+        return paths
+
+    async def run(self, mode, options):
+        asgi_application = WSGIToASGI(
+            self.wsgi_application, max_workers=options["threads"]
+        )
+        executor = asgi_application.executor
+        latencies = []
+
+        async def client():
+            for _ in range(options["requests"]):
+                path = random.choice(self.paths)
+                start = time.perf_counter()
+                if mode == "wsgi":
+                    await loop.run_in_executor(
+                        executor, self.request_wsgi, path, options
+                    )
+                else:
+                    await self.request_asgi(asgi_application, path, options)
+                latencies.append(time.perf_counter() - start)
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(client() for _ in range(options["clients"]))
+            )
+        finally:
+            executor.shutdown()
+        return latencies, time.perf_counter() - start
+
+    def request_wsgi(self, path, options):
+        """Serve a slow client in a worker thread, as a WSGI server does."""
+        time.sleep(options["client_delay"])
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "SCRIPT_NAME": "",
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "8000",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "HTTP_COOKIE": self.cookie,
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": "http",
+            "wsgi.input": BytesIO(),
+            "wsgi.errors": self.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": False,
+            "wsgi.run_once": False,
+        }
+        response = self.wsgi_application(environ, lambda *args: None)
+        try:
+            b"".join(response)
+        finally:
+            response.close()
+        time.sleep(options["client_delay"])
+
+    async def request_asgi(self, application, path, options):
+        """Serve a slow client on the event loop."""
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "GET",
+            "path": path,
+            "query_string": b"",
+            "headers": [(b"cookie", self.cookie.encode())],
+            "server": ("localhost", 8000),
+        }
+
+        async def receive():
+            await asyncio.sleep(options["client_delay"])
+            return {"type": "http.request", "body": b""}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                await asyncio.sleep(options["client_delay"])
+
+        await application(scope, receive, send)
@@ -0,0 +1,103 @@
+"""Compare the cache backends on the index page with several workers."""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.bench import summary
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the hit ratio and the latency of the index page for "
+        "each cache backend, with the given number of worker processes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--backends",
+            nargs="+",
+            default=["locmem", "file", "sqlite"],
+            choices=sorted(settings.CACHE_BACKENDS),
+        )
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--pages", type=int, default=10)
+        parser.add_argument(
+            "--worker", action="store_true", help=argparse.SUPPRESS
+        )
+        parser.add_argument(
+            "--clear", action="store_true", help=argparse.SUPPRESS
+        )
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            self.run_worker(options)
+            return
+        for backend in options["backends"]:
+            self.spawn(backend, options, ["--clear", "--requests", "0"])
+            workers = [
+                self.spawn(backend, options, [])
+                for _ in range(options["workers"])
+            ]
+            results = [
+                json.loads(worker.communicate()[0]) for worker in workers
+            ]
+            latencies = sum((result["latencies"] for result in results), [])
+            hits = sum(result["hits"] for result in results)
+            stats = summary(latencies)
+            self.stdout.write(
+                f"{backend:>10}: workers={options['workers']} "
+                f"requests={stats['requests']} "
+                f"hit ratio={hits / max(stats['requests'], 1):.2%} "
+                f"p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms"
+            )
+
+    def spawn(self, backend, options, extra):
+        command = [
+            sys.executable,
+            os.path.join(settings.BASE_DIR, "manage.py"),
+            "bench_cache",
+            "--worker",
+            "--requests",
+            str(options["requests"]),
+            "--pages",
+            str(options["pages"]),
+            *extra,
+        ]
+        worker = subprocess.Popen(
+            command,
+            env={**os.environ, "CACHE_BACKEND": backend},
+            stdout=subprocess.PIPE,
+        )
+        if "--clear" in extra:
+            worker.communicate()
+        return worker
+
+    def run_worker(self, options):
+        if options["clear"]:
+            cache.clear()
+        client = Client()
+        url = reverse("posts:index")
+        latencies = []
+        hits = 0
+        for _ in range(options["requests"]):
+            page = random.randint(1, options["pages"])
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                client.get(url, {"page": page})
+                latencies.append(time.perf_counter() - start)
+            hits += not queries.captured_queries
+        self.stdout.write(json.dumps({"latencies": latencies, "hits": hits}))
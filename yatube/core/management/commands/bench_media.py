@@ -0,0 +1,120 @@
+"""Compare the media view with the static serving of Django."""
+
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.views import static
+
+from core import media
+from core.bench import summary
+
+MODES = ("static", "media")
+SCENARIOS = ("full", "range", "revalidate")
+
+
+def consume(response):
+    """Read the body like a client and return its size."""
+    if not response.streaming:
+        return len(response.content)
+    sent = sum(len(chunk) for chunk in response.streaming_content)
+    response.close()
+    return sent
+
+
+class Command(BaseCommand):
+    help = (
+        "Request a media file whole, by ranges and with validators from "
+        "django.views.static.serve and from the media view, and report "
+        "the throughput, latency and bytes sent per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--size", type=int, default=2048, help="File size in KiB."
+        )
+        parser.add_argument(
+            "--range-size",
+            type=int,
+            default=64,
+            help="Size of a requested range in KiB.",
+        )
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+        parser.add_argument(
+            "--scenarios", nargs="+", default=SCENARIOS, choices=SCENARIOS
+        )
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        try:
+            content = os.urandom(options["size"] * 1024)
+            digest = hashlib.sha256(content).hexdigest()
+            self.path = f"posts/{digest[:2]}/{digest}.jpg"
+            os.makedirs(os.path.join(root, os.path.dirname(self.path)))
+            with open(os.path.join(root, self.path), "wb") as file:
+                file.write(content)
+            with override_settings(MEDIA_ROOT=root):
+                for mode in options["modes"]:
+                    for scenario in options["scenarios"]:
+                        self.report(mode, scenario, options)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+    def view(self, mode, request):
+        if mode == "static":
+            return static.serve(
+                request, self.path, document_root=settings.MEDIA_ROOT
+            )
+        return media.serve(request, self.path)
+
+    def headers(self, mode, scenario, options):
+        """Headers of the requests: a random range or the validators."""
+        if scenario == "full":
+            return lambda: {}
+        if scenario == "range":
+            size = options["size"] * 1024
+            length = options["range_size"] * 1024
+
+            def range_headers():
+                first = random.randrange(max(size - length, 1))
+                return {"HTTP_RANGE": f"bytes={first}-{first + length - 1}"}
+
+            return range_headers
+        response = self.view(mode, RequestFactory().get("/"))
+        consume(response)
+        validators = {"HTTP_IF_MODIFIED_SINCE": response["Last-Modified"]}
+        if response.has_header("ETag"):
+            validators["HTTP_IF_NONE_MATCH"] = response["ETag"]
+        return lambda: validators
+
+    def report(self, mode, scenario, options):
+        factory = RequestFactory()
+        headers = self.headers(mode, scenario, options)
+        latencies = []
+        sent = 0
+        statuses = set()
+        started = time.perf_counter()
+        for _ in range(options["requests"]):
+            request = factory.get("/", **headers())
+            begin = time.perf_counter()
+            response = self.view(mode, request)
+            sent += consume(response)
+            latencies.append(time.perf_counter() - begin)
+            statuses.add(response.status_code)
+        elapsed = time.perf_counter() - started
+        stats = summary(latencies)
+        self.stdout.write(
+            f"{mode} {scenario}: {stats['requests'] / elapsed:8.1f} req/s "
+            f"p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms "
+            f"{sent / stats['requests'] / 1024:.1f} KiB/request "
+            f"status={','.join(map(str, sorted(statuses)))} "
+            f"cache-control={response.get('Cache-Control', '-')}"
+        )
@@ -0,0 +1,156 @@
+"""Compare the SQLite profiles under a mixed load of readers and writers."""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.bench import summary
+from core.management.commands.sync_replicas import copy_database
+from posts.models import Post, User
+
+PROFILES = ("default", "production")
+
+
+class Command(BaseCommand):
+    help = (
+        "Run reader and writer processes on copies of the database, one "
+        "copy per SQLite profile, and report the latency, throughput and "
+        "errors of the reads and the writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--readers", type=int, default=4)
+        parser.add_argument("--writers", type=int, default=2)
+        parser.add_argument(
+            "--duration", type=float, default=10, help="Seconds per profile."
+        )
+        parser.add_argument(
+            "--profiles", nargs="+", default=PROFILES, choices=PROFILES
+        )
+        parser.add_argument(
+            "--worker", choices=("reader", "writer"), help=argparse.SUPPRESS
+        )
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            self.run_worker(options)
+            return
+        if connection.vendor != "sqlite":
+            raise CommandError("Only SQLite databases are compared")
+        if not Post.objects.exists():
+            raise CommandError("No posts to read, run generate_data first")
+        directory = tempfile.mkdtemp()
+        try:
+            for profile in options["profiles"]:
+                path = os.path.join(directory, f"{profile}.sqlite3")
+                copy_database(connection.settings_dict["NAME"], path)
+                self.reset_journal(path)
+                self.compare(profile, path, options)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def reset_journal(self, path):
+        """Start from the rollback journal, a profile may turn on WAL."""
+        copy = sqlite3.connect(path)
+        try:
+            copy.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            copy.close()
+
+    def compare(self, profile, path, options):
+        env = {**os.environ, "SQLITE_PROFILE": profile, "DATABASE_FILE": path}
+        workers = [
+            self.spawn(role, env, options)
+            for role in ["reader"] * options["readers"]
+            + ["writer"] * options["writers"]
+        ]
+        results = {"reader": [], "writer": []}
+        errors = {"reader": 0, "writer": 0}
+        for role, worker in workers:
+            result = json.loads(worker.communicate()[0])
+            results[role] += result["latencies"]
+            errors[role] += result["errors"]
+        for role in ("reader", "writer"):
+            stats = summary(results[role])
+            self.stdout.write(
+                f"{profile:>10} {role}s: "
+                f"{stats['requests'] / options['duration']:8.1f} req/s "
+                f"p50={stats['p50']:.2f}ms p95={stats['p95']:.2f}ms "
+                f"p99={stats['p99']:.2f}ms errors={errors[role]}"
+            )
+
+    def spawn(self, role, env, options):
+        command = [
+            sys.executable,
+            os.path.join(settings.BASE_DIR, "manage.py"),
+            "bench_sqlite",
+            "--worker",
+            role,
+            "--duration",
+            str(options["duration"]),
+        ]
+        return role, subprocess.Popen(command, env=env, stdout=subprocess.PIPE)
+
+    def run_worker(self, options):
+        client = Client()
+        users = list(User.objects.values_list("username", flat=True)[:100])
+        posts = list(Post.objects.values_list("id", flat=True)[:1000])
+        if options["worker"] == "writer":
+            client.force_login(User.objects.get(username=users[0]))
+        latencies = []
+        errors = 0
+        dummy = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            }
+        }
+        deadline = time.monotonic() + options["duration"]
+        with override_settings(CACHES=dummy):
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    if options["worker"] == "writer":
+                        self.write(client, posts)
+                    else:
+                        self.read(client, users, posts)
+                except OperationalError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - start)
+        self.stdout.write(
+            json.dumps({"latencies": latencies, "errors": errors})
+        )
+
+    def read(self, client, users, posts):
+        page = random.choice(("index", "profile", "post_detail"))
+        if page == "index":
+            return client.get(reverse("posts:index"))
+        if page == "profile":
+            username = random.choice(users)
+            return client.get(reverse("posts:profile", args=(username,)))
+        post_id = random.choice(posts)
+        return client.get(reverse("posts:post_detail", args=(post_id,)))
+
+    def write(self, client, posts):
+        if random.random() < 0.5:
+            return client.post(
+                reverse("posts:post_create"), {"text": "Пост под нагрузкой"}
+            )
+        return client.post(
+            reverse("posts:add_comment", args=(random.choice(posts),)),
+            {"text": "Комментарий под нагрузкой"},
+        )
@@ -0,0 +1,42 @@
+"""Run the queued side effects of the writes."""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import tasks
+from core.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the due tasks of the queue, polling for new ones every "
+        "--interval seconds, or once with --once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=1)
+        parser.add_argument(
+            "--once", action="store_true", help="Exit when no task is due."
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Queue the tasks that ran out of attempts again.",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_failed"]:
+            retried = Task.objects.filter(status=Task.FAILED).update(
+                status=Task.PENDING, attempts=0
+            )
+            self.stdout.write(f"Queued {retried} failed tasks again")
+        while True:
+            close_old_connections()
+            done = tasks.run_pending()
+            if done:
+                self.stdout.write(f"Ran {done} tasks")
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
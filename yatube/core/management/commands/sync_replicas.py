@@ -0,0 +1,61 @@
+"""Copy the primary SQLite database to the replica files."""
+
+import os
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def copy_database(source, target):
+    """Copy a consistent snapshot of the source file over the target.
+
+    The copy is written next to the target and renamed, so readers open
+    either the previous or the new copy.
+    """
+    temporary = f"{target}.tmp"
+    primary = sqlite3.connect(source)
+    replica = sqlite3.connect(temporary)
+    try:
+        primary.backup(replica)
+    finally:
+        replica.close()
+        primary.close()
+    os.replace(temporary, target)
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database to the files of the replicas, "
+        "once or every --interval seconds."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            help="Repeat the copy, should be less than REPLICA_LAG.",
+        )
+
+    def handle(self, *args, **options):
+        primary = connections["default"]
+        if primary.vendor != "sqlite":
+            raise CommandError("Only SQLite databases are copied")
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError("No replicas in DATABASE_REPLICA_FILES")
+        while True:
+            start = time.monotonic()
+            for alias in settings.DATABASE_REPLICAS:
+                copy_database(
+                    primary.settings_dict["NAME"],
+                    connections[alias].settings_dict["NAME"],
+                )
+            self.stdout.write(
+                f"Copied to {len(settings.DATABASE_REPLICAS)} replicas "
+                f"in {time.monotonic() - start:.2f}s"
+            )
+            if options["interval"] is None:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,154 @@
+"""Serving of the uploaded media files.
+
+The files are streamed by ``FileResponse``, so a WSGI server with a
+``wsgi.file_wrapper`` sends a whole file with ``sendfile``. A single
+byte range is answered with 206, multiple ranges with the whole file.
+The validators come from the size and the modification time of the
+file; names made of the content hash never change, so browsers keep
+them for a year without revalidating.
+"""
+
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    quote_etag,
+)
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+from sorl.thumbnail.conf import settings as sorl_settings
+
+BLOCK_SIZE = 64 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Names given by posts.storage.ContentAddressedStorage and the names of
+# the sorl thumbnails, the hash of their content-addressed source files
+IMMUTABLE_NAME = re.compile(
+    r"(^|/)[0-9a-f]{2}/[0-9a-f]{64}\.\w+$"
+    rf"|^{re.escape(sorl_settings.THUMBNAIL_PREFIX)}"
+    r"[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{32}\.\w+$"
+)
+RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class FileRange:
+    """Part of an open file read like a file of its own."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(header, size):
+    """Return the first and last byte of the range in the header.
+
+    Return None when the whole file is sent instead: the header has
+    several ranges or is invalid. Raise ``ValueError`` when the range
+    is outside the file.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if not first:
+        if int(last) == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    if first >= size:
+        raise ValueError("Range starts after the end of the file")
+    last = min(int(last), size - 1) if last else size - 1
+    if last < first:
+        return None
+    return first, last
+
+
+def range_allowed(request, etag, last_modified):
+    """Whether the ``If-Range`` validator, if any, is still current."""
+    validator = request.META.get("HTTP_IF_RANGE")
+    if validator is None:
+        return True
+    if validator.startswith('"'):
+        return validator == etag
+    return parse_http_date_safe(validator) == last_modified
+
+
+def file_response(request, full_path, size, etag, last_modified):
+    content_type = mimetypes.guess_type(full_path)[0]
+    content_type = content_type or "application/octet-stream"
+    header = request.META.get("HTTP_RANGE")
+    if header and range_allowed(request, etag, last_modified):
+        try:
+            requested = byte_range(header, size)
+        except ValueError:
+            response = HttpResponse(status=416, content_type=content_type)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+        if requested is not None:
+            first, last = requested
+            length = last - first + 1
+            # A part of the file has no file number, so servers read it
+            # instead of sending the rest of the file
+            response = FileResponse(
+                FileRange(open(full_path, "rb"), first, length),
+                status=206,
+                content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {first}-{last}/{size}"
+            response["Content-Length"] = length
+            response.block_size = BLOCK_SIZE
+            return response
+    response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    response["Content-Length"] = size
+    response.block_size = BLOCK_SIZE
+    return response
+
+
+@require_safe
+def serve(request, path):
+    """Send the media file, the requested part of it or 304."""
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+        stat_result = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404("Файл не найден")
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise Http404("Файл не найден")
+    size = stat_result.st_size
+    etag = quote_etag(f"{stat_result.st_mtime_ns:x}-{size:x}")
+    last_modified = int(stat_result.st_mtime)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = file_response(request, full_path, size, etag, last_modified)
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    response["Accept-Ranges"] = "bytes"
+    if IMMUTABLE_NAME.search(path):
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.MEDIA_MAX_AGE
+        )
+    return response
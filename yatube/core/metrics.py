@@ -0,0 +1,124 @@
+"""Cost of the requests by the URL name of their view.
+
+``RequestMetricsMiddleware`` measures every request: the number of SQL
+queries and their time, the time of rendering the templates and the
+total latency. The numbers are aggregated in this process and compared
+with the budgets of the views declared in ``settings.VIEW_BUDGETS``.
+"""
+
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.conf import settings
+
+from core.bench import summary
+
+# Number of the latest latencies of a view kept for the percentiles
+WINDOW = 1000
+
+_local = threading.local()
+_lock = threading.Lock()
+_views = {}
+
+
+class RequestMetrics:
+    """Cost of one request."""
+
+    def __init__(self):
+        self.view = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.latency = 0.0
+
+    def execute(self, execute, sql, params, many, context):
+        """Count the query, installed by ``connection.execute_wrapper``."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def over_budget(self):
+        """Return the names of the budgets of the view that are exceeded."""
+        budget = settings.VIEW_BUDGETS.get(self.view, {})
+        spent = {"queries": self.queries, "latency": self.latency * 1000}
+        return [name for name, limit in budget.items() if spent[name] > limit]
+
+    def as_dict(self):
+        return {
+            "view": self.view,
+            "queries": self.queries,
+            "db_ms": self.db_time * 1000,
+            "template_ms": self.template_time * 1000,
+            "latency_ms": self.latency * 1000,
+        }
+
+
+class _ViewStats:
+    def __init__(self):
+        self.requests = 0
+        self.over_budget = 0
+        self.totals = defaultdict(float)
+        self.max_queries = 0
+        self.latencies = deque(maxlen=WINDOW)
+
+    def add(self, metrics):
+        self.requests += 1
+        self.over_budget += bool(metrics.over_budget())
+        self.totals["queries"] += metrics.queries
+        self.totals["db_ms"] += metrics.db_time * 1000
+        self.totals["template_ms"] += metrics.template_time * 1000
+        self.max_queries = max(self.max_queries, metrics.queries)
+        self.latencies.append(metrics.latency)
+
+    def as_dict(self):
+        averages = {
+            name: total / self.requests for name, total in self.totals.items()
+        }
+        return {
+            "requests": self.requests,
+            "over_budget": self.over_budget,
+            "queries": averages["queries"],
+            "max_queries": self.max_queries,
+            "db_ms": averages["db_ms"],
+            "template_ms": averages["template_ms"],
+            "latency_ms": summary(list(self.latencies)),
+        }
+
+
+def start():
+    """Begin measuring the request handled by this thread."""
+    _local.metrics = RequestMetrics()
+    return _local.metrics
+
+
+def finish():
+    """Stop measuring the request handled by this thread."""
+    _local.metrics = None
+
+
+def add_template_time(seconds):
+    """Add the time of rendering a template to the current request."""
+    metrics = getattr(_local, "metrics", None)
+    if metrics is not None:
+        metrics.template_time += seconds
+
+
+def record(metrics):
+    """Add the cost of the finished request to the totals of its view."""
+    with _lock:
+        _views.setdefault(metrics.view, _ViewStats()).add(metrics)
+
+
+def snapshot():
+    """Return the totals of every view measured by this process."""
+    with _lock:
+        return {view: stats.as_dict() for view, stats in _views.items()}
+
+
+def reset():
+    with _lock:
+        _views.clear()
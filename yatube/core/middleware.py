@@ -0,0 +1,89 @@
+"""Middleware of the 'Core' application."""
+
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from core import metrics, routers
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """Measure the cost of every request by the URL name of its view.
+
+    The measurements are attached to the response as ``metrics`` and
+    added to the totals shown by the stats page. A request exceeding
+    the budget of its view is logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_metrics = metrics.start()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics.execute)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.finish()
+        request_metrics.latency = time.perf_counter() - start
+        match = request.resolver_match
+        if match is None:
+            return response
+        request_metrics.view = match.view_name
+        metrics.record(request_metrics)
+        exceeded = request_metrics.over_budget()
+        if exceeded:
+            logger.warning(
+                "%s is over its budget of %s: %s",
+                request.path,
+                ", ".join(exceeded),
+                request_metrics.as_dict(),
+            )
+        response.metrics = request_metrics
+        return response
+
+
+class ReplicaMiddleware:
+    """Read the posts pages from the replicas, keep the writers on primary.
+
+    Safe requests to the views of ``REPLICA_NAMESPACES`` read from the
+    replicas. A request that writes sets a cookie that keeps the reads
+    of the user on the primary database for ``REPLICA_LAG`` seconds, so
+    the user sees their own writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        routers.reset()
+        try:
+            response = self.get_response(request)
+            if settings.DATABASE_REPLICAS and routers.wrote():
+                response.set_cookie(
+                    settings.REPLICA_COOKIE,
+                    "1",
+                    max_age=settings.REPLICA_LAG,
+                    httponly=True,
+                    samesite="Lax",
+                )
+        finally:
+            routers.reset()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routers.use_replicas(
+            request.method in ("GET", "HEAD")
+            and request.resolver_match.namespace in settings.REPLICA_NAMESPACES
+            and settings.REPLICA_COOKIE not in request.COOKIES
+        )
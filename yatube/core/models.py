@@ -0,0 +1,38 @@
+"""Database settings of the 'Core' application."""
+
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Table settings for the queued side effects of the writes."""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    FAILED = "failed"
+    STATUSES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (FAILED, "Failed"),
+    ]
+
+    name = models.CharField(max_length=200)
+    args = models.TextField(default="[]")
+    key = models.CharField(max_length=40, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name}{self.args}"
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "run_at", "id"],
+                name="task_status_run_at_idx",
+            ),
+        ]
@@ -0,0 +1,57 @@
+"""Routing of the reads to the database replicas.
+
+``ReplicaMiddleware`` allows the reads of a request to go to the
+replicas listed in ``settings.DATABASE_REPLICAS``; everything else,
+including all writes, uses the primary database. The router notes the
+writes of the request, so the middleware can pin the user who wrote to
+the primary until the replicas catch up.
+"""
+
+import random
+import threading
+
+from django.conf import settings
+
+PRIMARY = "default"
+
+_state = threading.local()
+
+
+def reset():
+    """Forget the state of the previous request of this thread."""
+    _state.replicas = False
+    _state.wrote = False
+    _state.used = False
+
+
+def use_replicas(enabled):
+    """Allow or forbid the reads of this thread to go to the replicas."""
+    _state.replicas = enabled
+
+
+def wrote():
+    """Whether this thread wrote to the primary since ``reset``."""
+    return getattr(_state, "wrote", False)
+
+
+def replica_used():
+    """Whether this thread read from a replica since ``reset``."""
+    return getattr(_state, "used", False)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.DATABASE_REPLICAS and getattr(_state, "replicas", False):
+            _state.used = True
+            return random.choice(settings.DATABASE_REPLICAS)
+        return PRIMARY
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -0,0 +1,24 @@
+"""Signal handlers of the 'Core' application."""
+
+from django.conf import settings
+from django.core.signals import request_started
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from core import tasks
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    """Set the PRAGMAs of the SQLite profile on the new connection."""
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(request_started)
+def start_tasks(sender, **kwargs):
+    """Run the tasks left by the previous processes in the tasks thread."""
+    tasks.start()
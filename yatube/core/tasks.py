@@ -0,0 +1,215 @@
+"""Queue of the side effects of the writes.
+
+A write queues its slow side effects as rows of the ``Task`` table in
+its own transaction, so they are kept when the process stops and lost
+when the write is rolled back. ``TASKS_MODE`` selects who runs them:
+
+- ``thread`` - a thread of the web process, after the commit;
+- ``worker`` - the ``run_tasks`` command, in its own process;
+- ``eager`` - the request itself, when the task is queued.
+
+A failed task is retried later with a growing delay, up to
+``TASKS_MAX_ATTEMPTS`` times. The thread drains the queue once on the
+first request of the process and again when the next retry or expired
+lease is due.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.models import Task
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_timer = None
+_started = False
+_lock = threading.Lock()
+
+
+def task(func):
+    """Allow the function to be queued with ``enqueue``.
+
+    The arguments of a task are stored as JSON, so tasks take ids
+    rather than model instances.
+    """
+    func.is_task = True
+    return func
+
+
+def task_name(func):
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+def is_eager():
+    return settings.TASKS_MODE == "eager"
+
+
+def enqueue(func, *args, unique=False):
+    """Queue the call of the task with the arguments.
+
+    A ``unique`` call is not queued again while it is pending.
+    """
+    if not getattr(func, "is_task", False):
+        raise ValueError(f"{task_name(func)} is not a task")
+    if is_eager():
+        _call(func, args)
+        return
+    name = task_name(func)
+    args = json.dumps(args)
+    key = hashlib.sha1(f"{name}{args}".encode()).hexdigest()
+    if unique and Task.objects.filter(key=key, status=Task.PENDING).exists():
+        return
+    Task.objects.create(name=name, args=args, key=key)
+    if settings.TASKS_MODE == "thread":
+        transaction.on_commit(_drain_soon)
+
+
+def _call(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception("Task %s%s failed", task_name(func), args)
+
+
+def claim(limit):
+    """Lock the tasks due to run for this process and return them.
+
+    Tasks locked by a process that did not finish them in
+    ``TASKS_LEASE`` seconds are claimed again.
+    """
+    now = timezone.now()
+    due = Task.objects.filter(
+        Q(status=Task.PENDING, run_at__lte=now)
+        | Q(status=Task.RUNNING, locked_until__lt=now)
+    ).order_by("run_at", "id")
+    claimed = []
+    rows = due.values_list("id", "status", "locked_until")[:limit]
+    for task_id, status, locked_until in rows:
+        if take(task_id, status, locked_until, now):
+            claimed.append(Task.objects.get(id=task_id))
+    return claimed
+
+
+def take(task_id, status, locked_until, now):
+    """Lock the task unless another process changed it since it was read.
+
+    The status and the lease read identify the row, so of the processes
+    that read the same expired lease only one takes it.
+    """
+    return Task.objects.filter(
+        id=task_id, status=status, locked_until=locked_until
+    ).update(
+        status=Task.RUNNING,
+        locked_until=now + timedelta(seconds=settings.TASKS_LEASE),
+    )
+
+
+def run(task_row):
+    """Run the claimed task, delete it or schedule its retry."""
+    try:
+        func = import_string(task_row.name)
+        if not getattr(func, "is_task", False):
+            raise ValueError(f"{task_row.name} is not a task")
+        func(*json.loads(task_row.args))
+    except Exception:
+        task_row.attempts += 1
+        task_row.last_error = traceback.format_exc()
+        task_row.locked_until = None
+        if task_row.attempts >= settings.TASKS_MAX_ATTEMPTS:
+            task_row.status = Task.FAILED
+            logger.exception("Task %s failed", task_row)
+        else:
+            task_row.status = Task.PENDING
+            delay = settings.TASKS_RETRY_DELAY * 2 ** (task_row.attempts - 1)
+            task_row.run_at = timezone.now() + timedelta(seconds=delay)
+            logger.warning("Task %s failed, retried in %ss", task_row, delay)
+        task_row.save()
+        return False
+    task_row.delete()
+    return True
+
+
+def run_pending(limit=None):
+    """Run the due tasks until none is left, return how many succeeded."""
+    done = 0
+    batch = settings.TASKS_BATCH_SIZE
+    while limit is None or done < limit:
+        claimed = claim(batch if limit is None else min(batch, limit - done))
+        if not claimed:
+            break
+        done += sum(run(task_row) for task_row in claimed)
+    return done
+
+
+def executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="tasks"
+            )
+    return _executor
+
+
+def _drain_soon():
+    executor().submit(_drain)
+
+
+def start():
+    """Drain the tasks left by the previous processes, once."""
+    global _started
+    with _lock:
+        if _started or settings.TASKS_MODE != "thread":
+            return
+        _started = True
+    _drain_soon()
+
+
+def schedule_drain():
+    """Drain again when the next retry or expired lease is due."""
+    global _timer
+    due = Task.objects.aggregate(
+        retry=Min("run_at", filter=Q(status=Task.PENDING)),
+        lease=Min("locked_until", filter=Q(status=Task.RUNNING)),
+    )
+    due = [value for value in due.values() if value is not None]
+    with _lock:
+        if _timer is not None:
+            _timer.cancel()
+            _timer = None
+        if not due:
+            return
+        delay = (min(due) - timezone.now()).total_seconds()
+        _timer = threading.Timer(max(delay, 0), _drain_soon)
+        _timer.daemon = True
+        _timer.start()
+
+
+def wait():
+    """Wait for the tasks thread to run the tasks queued before."""
+    with _lock:
+        pool = _executor
+    if pool is not None:
+        pool.submit(int).result()
+
+
+def _drain():
+    try:
+        run_pending()
+        schedule_drain()
+    except Exception:
+        logger.exception("Queued tasks are not run")
+    finally:
+        connections.close_all()
@@ -0,0 +1,41 @@
+"""Helpers of the tests."""
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """Run the queued tasks in the tests themselves.
+
+    The test database is in memory: a task thread writing to it while
+    the test holds its tables would fail, and the tests check the side
+    effects of the writes right after them.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.eager_tasks = override_settings(TASKS_MODE="eager")
+        self.eager_tasks.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.eager_tasks.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class BudgetTestMixin:
+    """Check the cost of the responses against the budgets of the views."""
+
+    def assertWithinBudget(self, response):
+        request_metrics = response.metrics
+        self.assertIn(
+            request_metrics.view,
+            settings.VIEW_BUDGETS,
+            f"No budget of {request_metrics.view} in VIEW_BUDGETS",
+        )
+        self.assertEqual(
+            request_metrics.over_budget(),
+            [],
+            f"{request_metrics.view} is over its budget: "
+            f"{request_metrics.as_dict()}",
+        )
@@ -0,0 +1,123 @@
+import asyncio
+
+from django.core.wsgi import get_wsgi_application
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase
+from django.urls import reverse
+
+from core.asgi import WSGIToASGI
+
+
+def echo(environ, start_response):
+    """WSGI application answering with its environ and request body."""
+    start_response("201 Created", [("Content-Type", "text/plain")])
+    body = environ["wsgi.input"].read()
+    return [
+        environ["PATH_INFO"].encode("latin1"),
+        b"?" + environ["QUERY_STRING"].encode(),
+        b" " + environ.get("HTTP_X_TAG", "").encode(),
+        b" " + body,
+    ]
+
+
+def stream(environ, start_response):
+    response = StreamingHttpResponse(iter([b"one", b"two"]))
+    start_response("200 OK", list(response.items()))
+    return response
+
+
+class WSGIToASGITests(SimpleTestCase):
+    def request(self, application, path, body=b"", headers=()):
+        """Serve the request, return the messages sent to the client."""
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": "POST" if body else "GET",
+            "path": path,
+            "query_string": b"page=2",
+            "headers": list(headers),
+            "server": ("localhost", 8000),
+        }
+        chunks = [body[:2], body[2:]]
+        sent = []
+
+        async def receive():
+            chunk = chunks.pop(0)
+            return {
+                "type": "http.request",
+                "body": chunk,
+                "more_body": bool(chunks),
+            }
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        application.executor.shutdown()
+        return sent
+
+    def test_serves_wsgi_application(self):
+        """The environ is built from the scope and the body is received."""
+        sent = self.request(
+            WSGIToASGI(echo),
+            "/группа/",
+            body=b"text=hi",
+            headers=[(b"x-tag", b"a"), (b"x-tag", b"b")],
+        )
+        self.assertEqual(sent[0]["status"], 201)
+        self.assertEqual(
+            sent[0]["headers"], [(b"content-type", b"text/plain")]
+        )
+        self.assertEqual(
+            sent[1]["body"], "/группа/?page=2 a,b text=hi".encode()
+        )
+
+    def test_streams_streaming_responses(self):
+        """Streaming responses are sent chunk by chunk."""
+        sent = self.request(WSGIToASGI(stream), "/")
+        self.assertEqual(
+            [message.get("body") for message in sent[1:]],
+            [b"one", b"two", b""],
+        )
+
+    def test_disconnected_client_is_not_served(self):
+        """A client leaving before sending its request gets no response."""
+        sent = []
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        application = WSGIToASGI(echo)
+        scope = {"type": "http", "method": "GET", "path": "/"}
+        asyncio.run(application(scope, receive, send))
+        self.assertEqual(sent, [])
+
+    def test_lifespan(self):
+        """Startup and shutdown of the server are acknowledged."""
+        messages = [
+            {"type": "lifespan.startup"},
+            {"type": "lifespan.shutdown"},
+        ]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message["type"])
+
+        asyncio.run(WSGIToASGI(echo)({"type": "lifespan"}, receive, send))
+        self.assertEqual(
+            sent, ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
+
+    def test_serves_django(self):
+        """Pages of the project are served through the adapter."""
+        sent = self.request(
+            WSGIToASGI(get_wsgi_application()), reverse("about:author")
+        )
+        self.assertEqual(sent[0]["status"], 200)
+        self.assertIn(b"<html", sent[1]["body"])
@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from core.bench import compare, percentile
+
+
+class BenchTests(SimpleTestCase):
+    def test_percentile(self):
+        """Percentiles are taken by the nearest rank."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_compare_with_baseline(self):
+        """Slower pages and extra queries are regressions."""
+        baseline = {
+            "index": {"p95": 10.0, "throughput": 100.0, "queries": 3},
+            "profile": {"p95": 10.0, "throughput": 100.0, "queries": 5},
+        }
+        results = {
+            "index": {"p95": 11.0, "throughput": 90.0, "queries": 3},
+            "profile": {"p95": 13.0, "throughput": 70.0, "queries": 6},
+            "post_detail": {"p95": 50.0, "throughput": 1.0, "queries": 9},
+        }
+        regressions = compare(results, baseline, tolerance=20)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(
+            all(regression.startswith("profile") for regression in regressions)
+        )
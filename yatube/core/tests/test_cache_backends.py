@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.test import SimpleTestCase
+
+from core.cache_backends import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache.sqlite3")
+        self.cache = SQLiteCache(self.path, {"OPTIONS": {"MAX_ENTRIES": 10}})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_values_shared_between_instances(self):
+        """Entries are visible to another cache on the same file."""
+        self.cache.set("key", {"value": 1}, timeout=None)
+        other = SQLiteCache(self.path, {})
+        self.assertEqual(other.get("key"), {"value": 1})
+        self.assertEqual(
+            other.get_many(["key", "missing"]), {"key": {"value": 1}}
+        )
+
+    def test_add_does_not_overwrite(self):
+        """add() stores only missing or expired keys."""
+        self.assertTrue(self.cache.add("key", 1))
+        self.assertFalse(self.cache.add("key", 2))
+        self.assertEqual(self.cache.get("key"), 1)
+        self.cache.set("expired", 1, timeout=0)
+        self.assertTrue(self.cache.add("expired", 2, DEFAULT_TIMEOUT))
+
+    def test_expired_and_deleted_keys_missing(self):
+        """Expired and deleted keys are not returned."""
+        self.cache.set("expired", 1, timeout=0)
+        self.cache.set("deleted", 1)
+        self.cache.delete("deleted")
+        for key in ("expired", "deleted"):
+            with self.subTest(key=key):
+                self.assertIsNone(self.cache.get(key))
+
+    def test_cull(self):
+        """The number of entries stays near MAX_ENTRIES."""
+        self.cache.set_many({f"key{i}": i for i in range(30)})
+        for i in range(30):
+            self.cache.set(f"other{i}", i)
+        count = self.cache.connection.execute(
+            "SELECT COUNT(*) FROM cache"
+        ).fetchone()[0]
+        self.assertLessEqual(count, 11)
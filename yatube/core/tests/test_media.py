@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core import media
+from core.testing import BudgetTestMixin
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+CONTENT = bytes(range(256)) * 4
+HASHED_NAME = f"posts/ab/{'ab' * 32}.png"
+THUMBNAIL_NAME = f"cache/ab/cd/{'abcd' * 8}.jpg"
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class MediaTests(BudgetTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for name in ("posts/image.png", HASHED_NAME, THUMBNAIL_NAME):
+            path = os.path.join(TEMP_MEDIA_ROOT, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(CONTENT)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, name=HASHED_NAME, **headers):
+        return self.client.get(reverse("media", args=(name,)), **headers)
+
+    def test_file_streamed_with_validators(self):
+        """The file is streamed from disk with its validators."""
+        response = self.get()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(b"".join(response.streaming_content), CONTENT)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+        self.assertTrue(response.has_header("ETag"))
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertWithinBudget(response)
+
+    def test_whole_file_sent_by_server(self):
+        """A whole file is left to the file wrapper of the server."""
+        response = media.serve(RequestFactory().get("/"), HASHED_NAME)
+        self.addCleanup(response.close)
+        self.assertTrue(response.file_to_stream.fileno())
+
+    def test_cache_lifetime(self):
+        """Content-addressed names are immutable, others expire."""
+        self.assertEqual(
+            self.get()["Cache-Control"],
+            "public, max-age=31536000, immutable",
+        )
+        self.assertEqual(
+            self.get("posts/image.png")["Cache-Control"],
+            f"public, max-age={settings.MEDIA_MAX_AGE}",
+        )
+
+    def test_thumbnails_immutable(self):
+        """Thumbnails named by the hash of their source are immutable."""
+        self.assertEqual(
+            self.get(THUMBNAIL_NAME)["Cache-Control"],
+            "public, max-age=31536000, immutable",
+        )
+
+    def test_not_modified(self):
+        """A current validator is answered with 304."""
+        etag = self.get()["ETag"]
+        response = self.get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_ranges(self):
+        """A single range is sent as partial content."""
+        size = len(CONTENT)
+        cases = (
+            ("bytes=0-9", 0, 9),
+            ("bytes=1000-", 1000, size - 1),
+            ("bytes=-24", size - 24, size - 1),
+            ("bytes=1000-5000", 1000, size - 1),
+        )
+        for header, first, last in cases:
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(
+                    response.status_code, HTTPStatus.PARTIAL_CONTENT
+                )
+                end = last + 1
+                self.assertEqual(
+                    b"".join(response.streaming_content), CONTENT[first:end]
+                )
+                self.assertEqual(
+                    response["Content-Range"], f"bytes {first}-{last}/{size}"
+                )
+                self.assertEqual(
+                    response["Content-Length"], str(last - first + 1)
+                )
+
+    def test_whole_file_instead_of_range(self):
+        """Several ranges and a changed file get the whole file."""
+        cases = (
+            {"HTTP_RANGE": "bytes=0-1,5-6"},
+            {"HTTP_RANGE": "bytes=0-9", "HTTP_IF_RANGE": '"changed"'},
+        )
+        for headers in cases:
+            with self.subTest(headers=headers):
+                response = self.get(**headers)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(b"".join(response.streaming_content), CONTENT)
+
+    def test_range_not_satisfiable(self):
+        """A range after the end of the file is rejected."""
+        response = self.get(HTTP_RANGE=f"bytes={len(CONTENT)}-")
+        self.assertEqual(
+            response.status_code, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE
+        )
+        self.assertEqual(response["Content-Range"], f"bytes */{len(CONTENT)}")
+
+    def test_missing_files(self):
+        """Missing files, directories and paths outside are not found."""
+        for name in ("posts/missing.png", "posts", "../settings.py"):
+            with self.subTest(name=name):
+                self.assertEqual(
+                    self.get(name).status_code, HTTPStatus.NOT_FOUND
+                )
@@ -0,0 +1,45 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import metrics
+
+User = get_user_model()
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="User")
+        cls.staff = User.objects.create_user(username="Staff", is_staff=True)
+
+    def setUp(self):
+        metrics.reset()
+        self.staff_client = Client()
+        self.staff_client.force_login(MetricsTests.staff)
+
+    def test_response_measured(self):
+        """The response carries the cost of the request."""
+        response = self.client.get(reverse("posts:index"))
+        request_metrics = response.metrics
+        self.assertEqual(request_metrics.view, "posts:index")
+        self.assertGreater(request_metrics.queries, 0)
+        self.assertGreater(request_metrics.template_time, 0)
+        self.assertGreaterEqual(
+            request_metrics.latency,
+            request_metrics.db_time + request_metrics.template_time,
+        )
+
+    def test_stats_page(self):
+        """The stats page shows the totals of the views to staff only."""
+        self.client.get(reverse("posts:index"))
+        self.client.get(reverse("posts:index"))
+        response = self.staff_client.get(reverse("stats"))
+        stats = response.json()
+        self.assertEqual(stats["views"]["posts:index"]["requests"], 2)
+        self.assertIn("latency_ms", stats["views"]["posts:index"])
+        self.assertIn("feed_cache", stats)
+        user_client = Client()
+        user_client.force_login(MetricsTests.user)
+        response = user_client.get(reverse("stats"))
+        self.assertEqual(response.status_code, 302)
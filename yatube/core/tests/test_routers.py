@@ -0,0 +1,72 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import resolve
+
+from core import routers
+from core.middleware import ReplicaMiddleware
+from posts import cache
+from posts.models import Post
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def tearDown(self):
+        routers.reset()
+
+    def view(self, request):
+        """Stand-in of the view noting where its reads would go."""
+        self.reads.append(self.router.db_for_read(Post))
+        if request.method == "POST":
+            self.router.db_for_write(Post)
+        return HttpResponse()
+
+    def handle(self, request, path):
+        request.resolver_match = resolve(path)
+
+        def get_response(request):
+            middleware.process_view(request, self.view, (), {})
+            return self.view(request)
+
+        middleware = ReplicaMiddleware(get_response)
+        return middleware(request)
+
+    def test_reads_outside_requests_use_primary(self):
+        """Reads go to the primary unless a request allows the replicas."""
+        self.assertEqual(self.router.db_for_read(Post), "default")
+        routers.use_replicas(True)
+        self.assertEqual(self.router.db_for_read(Post), "replica1")
+        self.assertEqual(self.router.db_for_write(Post), "default")
+        self.assertTrue(routers.wrote())
+
+    def test_feed_reads_use_replicas(self):
+        """Safe requests of the posts pages read from the replicas."""
+        response = self.handle(self.factory.get("/"), "/")
+        self.assertEqual(self.reads, ["replica1"])
+        self.assertNotIn("primary", response.cookies)
+
+    def test_writer_pinned_to_primary(self):
+        """The user who wrote reads from the primary for a while."""
+        response = self.handle(self.factory.post("/create/"), "/create/")
+        self.assertIn("primary", response.cookies)
+        request = self.factory.get("/")
+        request.COOKIES["primary"] = "1"
+        self.handle(request, "/")
+        self.assertEqual(self.reads, ["default", "default"])
+
+    def test_other_pages_use_primary(self):
+        """Pages outside of REPLICA_NAMESPACES read from the primary."""
+        self.handle(self.factory.get("/about/author/"), "/about/author/")
+        self.assertEqual(self.reads, ["default"])
+
+    @override_settings(REPLICA_LAG=5, FEED_CACHE_TIMEOUT=None)
+    def test_pages_from_replicas_cached_briefly(self):
+        """A feed page read from a replica expires after the lag."""
+        self.assertIsNone(cache._timeout())
+        routers.use_replicas(True)
+        self.router.db_for_read(Post)
+        self.assertEqual(cache._timeout(), 5)
@@ -0,0 +1,20 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core.signals import tune_sqlite
+
+
+@skipUnless(connection.vendor == "sqlite", "PRAGMAs of SQLite")
+class TuneSQLiteTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    @override_settings(SQLITE_PRAGMAS={"cache_size": -1234})
+    def test_pragmas_set_on_new_connection(self):
+        """The PRAGMAs of the profile are set on a new connection."""
+        tune_sqlite(sender=type(connection), connection=connection)
+        self.assertEqual(self.pragma("cache_size"), -1234)
@@ -0,0 +1,153 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import tasks
+from core.models import Task
+from posts.models import Comment, Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+calls = []
+
+
+@tasks.task
+def record(value):
+    calls.append(value)
+
+
+@tasks.task
+def fail():
+    raise RuntimeError("Ошибка")
+
+
+def not_a_task():
+    pass
+
+
+@override_settings(
+    TASKS_MODE="worker", TASKS_MAX_ATTEMPTS=2, TASKS_RETRY_DELAY=10
+)
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_queued_task_run_and_removed(self):
+        """A queued task waits for the worker and is removed once run."""
+        tasks.enqueue(record, 1)
+        self.assertEqual(calls, [])
+        self.assertEqual(tasks.run_pending(), 1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_unique_task_queued_once(self):
+        """A unique task is not queued again while it is pending."""
+        tasks.enqueue(record, 1, unique=True)
+        tasks.enqueue(record, 1, unique=True)
+        tasks.enqueue(record, 2, unique=True)
+        self.assertEqual(Task.objects.count(), 2)
+
+    def test_task_of_rolled_back_write_dropped(self):
+        """A task is queued in the transaction of the write."""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                tasks.enqueue(record, 1)
+                raise RuntimeError
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_task_retried_then_failed(self):
+        """A failed task is retried later until it runs out of attempts."""
+        tasks.enqueue(fail)
+        with self.assertLogs("core.tasks", "WARNING"):
+            self.assertEqual(tasks.run_pending(), 0)
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.PENDING)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.run_at, timezone.now())
+        self.assertIn("Ошибка", task.last_error)
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("core.tasks", "ERROR"):
+            tasks.run_pending()
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    def test_expired_lease_claimed_again(self):
+        """Tasks of a worker that stopped are run by another one."""
+        tasks.enqueue(record, 1)
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertEqual(tasks.claim(10), [])
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        self.assertEqual(tasks.run_pending(), 1)
+
+    def test_expired_lease_taken_once(self):
+        """Of the processes that read an expired lease one takes it."""
+        tasks.enqueue(record, 1)
+        tasks.claim(10)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        row = Task.objects.values_list("id", "status", "locked_until").get()
+        self.assertEqual(len(tasks.claim(10)), 1)
+        self.assertFalse(tasks.take(*row, timezone.now()))
+
+    def test_drain_scheduled_for_retry(self):
+        """The thread drains the queue again when a retry is due."""
+        tasks.enqueue(fail)
+        with self.assertLogs("core.tasks", "WARNING"):
+            tasks.run_pending()
+        with mock.patch("core.tasks.threading.Timer") as timer:
+            tasks.schedule_drain()
+        delay, function = timer.call_args[0]
+        self.assertAlmostEqual(delay, 10, delta=1)
+        self.assertIs(function, tasks._drain_soon)
+        timer.return_value.start.assert_called_once()
+        Task.objects.all().delete()
+        with mock.patch("core.tasks.threading.Timer") as timer:
+            tasks.schedule_drain()
+        timer.assert_not_called()
+
+    @override_settings(TASKS_MODE="thread")
+    def test_left_tasks_drained_on_first_request(self):
+        """The tasks thread runs the tasks left by the previous process."""
+        with mock.patch("core.tasks._started", False), mock.patch(
+            "core.tasks._drain_soon"
+        ) as drain:
+            self.client.get("/")
+            self.client.get("/")
+        drain.assert_called_once_with()
+
+    def test_only_tasks_queued(self):
+        """Functions not marked as tasks are not queued."""
+        with self.assertRaises(ValueError):
+            tasks.enqueue(not_a_task)
+
+    def test_command_runs_due_tasks(self):
+        """The worker command runs the due tasks and exits with --once."""
+        tasks.enqueue(record, 1)
+        out = StringIO()
+        call_command("run_tasks", "--once", stdout=out)
+        self.assertEqual(calls, [1])
+        self.assertIn("Ran 1 tasks", out.getvalue())
+
+    def test_side_effects_of_writes_queued(self):
+        """Fan-out and notifications of the posts run in the worker."""
+        author = User.objects.create_user(
+            username="Author", email="author@example.com"
+        )
+        reader = User.objects.create_user(username="Reader")
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(text="Пост", author=author)
+        Comment.objects.create(text="Комментарий", author=reader, post=post)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        self.assertEqual(mail.outbox, [])
+        tasks.run_pending()
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=reader, post=post).exists()
+        )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["author@example.com"])
+        self.assertIn("Комментарий", mail.outbox[0].body)
@@ -2,8 +2,13 @@
 
 from http import HTTPStatus
 
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
 from django.shortcuts import render
 
+from core import metrics
+from posts import cache
+
 
 def page_not_found(request, exception):
     return render(
@@ -31,3 +36,11 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=""):
     return render(request, "core/403csrf.html")
+
+
+@staff_member_required
+def stats(request):
+    """Cost of the views and the feed cache events in this process."""
+    return JsonResponse(
+        {"views": metrics.snapshot(), "feed_cache": dict(cache.stats)}
+    )
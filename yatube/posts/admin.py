@@ -1,8 +1,11 @@
 """Admin site settings of the 'Posts' application."""
 
 from django.contrib import admin
+from django.db.models.expressions import RawSQL
 
+from posts import search
 from posts.models import Comment, Follow, Group, Post
+from posts.thumbnails import schedule_post
 
 
 @admin.register(Post)
@@ -21,6 +24,20 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ("pub_date",)
     empty_value_display = "-пусто-"
 
+    def save_model(self, request, obj, form, change):
+        """Queue the thumbnail of the image like the post form does."""
+        super().save_model(request, obj, form, change)
+        schedule_post(obj)
+
+    def get_search_results(self, request, queryset, search_term):
+        """Find the posts in the full-text index instead of LIKE scans."""
+        if not search_term or not search.available():
+            return super().get_search_results(request, queryset, search_term)
+        if not search.match_expression(search_term):
+            return queryset.none(), False
+        ids = RawSQL(*search.matching_ids(search_term))
+        return queryset.filter(id__in=ids), False
+
 
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
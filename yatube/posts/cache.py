@@ -0,0 +1,359 @@
+"""Caching of the feed pages by generations.
+
+Every feed depends on a set of scopes: all posts, the posts of a group
+or of an author. Each scope has a generation token in the cache and a
+cached page is stored under the tokens of its scopes, so a write that
+bumps a generation makes all pages of the scope unreachable at once.
+The pages do not expire, but after ``FEED_CACHE_REFRESH`` seconds they
+may be recomputed early by a single request.
+
+The generations also validate the copies held by the clients: the ETag
+of a page is derived from them and the Last-Modified date is the time
+of the latest one, so an unchanged page is answered with 304.
+"""
+
+import hashlib
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter, namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from core import routers
+from posts.models import Post
+
+POSTS = "posts"
+GROUPS = "groups"
+GROUP = "group:{slug}"
+AUTHOR = "author:{username}"
+FOLLOWER = "follower:{user_id}"
+POST = "post:{post_id}"
+
+WAIT_INTERVAL = 0.05
+
+Entry = namedtuple("Entry", ("response", "expires", "delta"))
+
+# Events of the feed cache in this process: hits, misses, stale, recomputes
+stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def _generation_key(scope):
+    return f"generation:{scope}"
+
+
+def _new_generation():
+    return f"{time.time():.6f}-{uuid.uuid4().hex}"
+
+
+def generation_time(generation):
+    """Return the time the generation was created, None if unknown."""
+    try:
+        return float(generation.split("-", 1)[0])
+    except ValueError:
+        return None
+
+
+def get_generations(scopes):
+    """Return the generation tokens of the scopes.
+
+    A missing token is replaced by a new one, so the pages cached
+    before it was evicted are not reachable anymore.
+    """
+    keys = [_generation_key(scope) for scope in scopes]
+    generations = cache.get_many(keys)
+    missing = {
+        key: _new_generation() for key in keys if key not in generations
+    }
+    if missing:
+        cache.set_many(missing, timeout=None)
+        generations.update(missing)
+    return [generations[key] for key in keys]
+
+
+def bump(*scopes):
+    """Invalidate all cached pages of the scopes."""
+    cache.set_many(
+        {_generation_key(scope): _new_generation() for scope in scopes},
+        timeout=None,
+    )
+
+
+def post_scopes(post, *groups):
+    """Return the scopes showing the post (and its previous groups)."""
+    scopes = [
+        POSTS,
+        AUTHOR.format(username=post.author.username),
+        POST.format(post_id=post.pk),
+    ]
+    for group in (post.group, *groups):
+        if group is not None:
+            scopes.append(GROUP.format(slug=group.slug))
+    return scopes
+
+
+def post_detail_scopes(request, post_id):
+    """Scopes of the page of a post: the post, its author and its group."""
+    scopes = [POST.format(post_id=post_id)]
+    post = (
+        Post.objects.filter(pk=post_id)
+        .values_list("author__username", "group__slug")
+        .first()
+    )
+    if post is not None:
+        username, slug = post
+        scopes.append(AUTHOR.format(username=username))
+        if slug is not None:
+            scopes.append(GROUP.format(slug=slug))
+    return scopes
+
+
+def page_key(request, view_name):
+    """Return the cache key of the page for the user of the request."""
+    if request.user.is_authenticated:
+        user = str(request.user.pk)
+    else:
+        user = "anonymous"
+    url = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return ":".join(("page", view_name, user, url))
+
+
+def page_scopes(request, scopes, kwargs):
+    """Format the scopes of the page with the keyword arguments of the view.
+
+    A callable scope is called with the request and the keyword
+    arguments and returns a list of scopes. Pages of authenticated users
+    also depend on the follows of the user.
+    """
+    formatted = []
+    for scope in scopes:
+        if callable(scope):
+            formatted += scope(request, **kwargs)
+        else:
+            formatted.append(scope.format(**kwargs))
+    if request.user.is_authenticated:
+        formatted.append(FOLLOWER.format(user_id=request.user.pk))
+    return formatted
+
+
+def validators(key, generations):
+    """Return the ETag and the Last-Modified timestamp of the page.
+
+    ``key`` is the cache key of the page under the ``generations``.
+    """
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    times = [generation_time(generation) for generation in generations]
+    if None in times:
+        return etag, None
+    return etag, int(max(times, default=0)) or None
+
+
+def set_validators(request, response, etag, last_modified):
+    """Set the validators of the page, the clients revalidate their copy.
+
+    A page read from a replica may be older than the generations, it is
+    sent without validators.
+    """
+    if routers.replica_used():
+        return
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    if request.user.is_authenticated:
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+
+
+def _with_token(key, request, forms):
+    """Add the CSRF token of the client to the key of a page with forms."""
+    if not forms:
+        return key
+    return f"{key}:{request.META.get('CSRF_COOKIE', '')}"
+
+
+def conditional(*scopes, forms=False):
+    """Answer 304 while the generations of the scopes of the page hold.
+
+    The scopes are those of ``cache_feed``; the view runs only when the
+    copy of the client is missing or outdated. A page with ``forms``
+    holds the CSRF token of the client, which changes on login, so the
+    copy made with another token is outdated too.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            generations = get_generations(page_scopes(request, scopes, kwargs))
+            key = ":".join((page_key(request, view.__name__), *generations))
+            etag, last_modified = validators(
+                _with_token(key, request, forms), generations
+            )
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                _count("not_modified")
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if forms:
+                    # The page may hold the first token of the client
+                    etag, last_modified = validators(
+                        _with_token(key, request, forms), generations
+                    )
+            set_validators(request, response, etag, last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _count(event):
+    with _stats_lock:
+        stats[event] += 1
+
+
+def _refresh_early(entry):
+    """Whether this request should recompute the entry before it expires.
+
+    The probability grows as the soft expiry approaches and is higher
+    for slow pages (XFetch), so one request refreshes the page while
+    the others still get the cached copy.
+    """
+    if entry.expires is None:
+        return False
+    # random() may return 0, which has no logarithm
+    uniform = 1.0 - random.random()
+    gap = -entry.delta * settings.FEED_CACHE_BETA * math.log(uniform)
+    return time.time() + gap >= entry.expires
+
+
+def _wait(key):
+    """Wait for the page computed by the holder of the lock."""
+    deadline = time.monotonic() + settings.FEED_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def _cached_entry(key, page, lock, token):
+    """Return the entry to send instead of recomputing the page.
+
+    None means that this request recomputes the page: it took the lock
+    or gave up waiting for the request holding it. While the lock is
+    held, the other requests get the current entry when it is only due
+    for an early refresh, else the previous version of the page.
+    """
+    entry = cache.get(key)
+    if entry is not None and not _refresh_early(entry):
+        _count("hits")
+        return entry
+    if entry is None:
+        _count("misses")
+    if cache.add(lock, token, settings.FEED_CACHE_LOCK_TIMEOUT):
+        return None
+    if entry is not None:
+        _count("hits")
+        return entry
+    stale = cache.get(page)
+    if stale is not None:
+        _count("stale")
+        return stale
+    entry = _wait(key)
+    if entry is not None:
+        _count("hits")
+    return entry
+
+
+def _release(lock, token):
+    """Delete the lock unless another request holds it now."""
+    if cache.get(lock) == token:
+        cache.delete(lock)
+
+
+def _recompute(view, request, args, kwargs, keys, page_validators):
+    """Render the page and cache it under its key and as the last page."""
+    start = time.monotonic()
+    response = view(request, *args, **kwargs)
+    _count("recomputes")
+    if response.status_code == 200 and not response.cookies:
+        set_validators(request, response, *page_validators)
+        entry = Entry(response, _soft_expiry(), time.monotonic() - start)
+        cache.set_many(dict.fromkeys(keys, entry), _timeout())
+    return response
+
+
+def cache_feed(*scopes):
+    """Cache the page until a generation of one of its scopes changes.
+
+    The scopes are formatted with the keyword arguments of the view,
+    authenticated users get their own copy of the page. Only one
+    request recomputes a missing page: the others get the previous
+    version of the page while the lock is held. A client holding the
+    current version of the page gets 304 before the cache is read.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, *args, **kwargs)
+            page = page_key(request, view.__name__)
+            generations = get_generations(page_scopes(request, scopes, kwargs))
+            key = ":".join((page, *generations))
+            etag, last_modified = validators(key, generations)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is not None:
+                _count("not_modified")
+                set_validators(request, response, etag, last_modified)
+                return response
+            lock = f"lock:{key}"
+            token = uuid.uuid4().hex
+            entry = _cached_entry(key, page, lock, token)
+            if entry is not None:
+                return entry.response
+            try:
+                return _recompute(
+                    view,
+                    request,
+                    args,
+                    kwargs,
+                    (key, page),
+                    (etag, last_modified),
+                )
+            finally:
+                _release(lock, token)
+
+        return wrapper
+
+    return decorator
+
+
+def _timeout():
+    """A page read from a replica may miss the writes of the last seconds."""
+    if routers.replica_used():
+        return settings.REPLICA_LAG
+    return settings.FEED_CACHE_TIMEOUT
+
+
+def _soft_expiry():
+    if settings.FEED_CACHE_REFRESH is None:
+        return None
+    return time.time() + settings.FEED_CACHE_REFRESH
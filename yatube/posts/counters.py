@@ -0,0 +1,101 @@
+"""Denormalized counters of posts, comments and follows.
+
+The counters are changed by the signal handlers in the transaction of
+the write, so pages read them instead of running ``COUNT(*)``. Writes
+that skip the signals (``bulk_create``, ``QuerySet.update``) leave a
+drift that is fixed by the ``recount_counters`` command.
+"""
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from posts.models import Comment, Follow, Group, Post, Profile, User
+
+
+def change(queryset, field, delta):
+    """Add the delta to the counter of the rows of the queryset."""
+    if delta < 0:
+        queryset = queryset.filter(**{f"{field}__gte": -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def change_author(user_id, delta):
+    """Add the delta to the number of posts of the author."""
+    profiles = Profile.objects.filter(user_id=user_id)
+    if not change(profiles, "posts_count", delta):
+        Profile.objects.get_or_create(
+            user_id=user_id,
+            defaults={
+                "posts_count": Post.objects.filter(author_id=user_id).count()
+            },
+        )
+
+
+def change_follows(user_id, author_id, delta):
+    """Add the delta to the follows of the user and of the author."""
+    change(Profile.objects.filter(user=user_id), "following_count", delta)
+    change(Profile.objects.filter(user=author_id), "followers_count", delta)
+
+
+def _actual(model, field, outer="pk"):
+    """Return the subquery counting rows of the model per related key."""
+    rows = (
+        model.objects.filter(**{field: OuterRef(outer)})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(rows), 0)
+
+
+def _reconcile(queryset, field, actual):
+    drifted = list(
+        queryset.annotate(actual=actual).exclude(**{field: F("actual")})
+    )
+    for row in drifted:
+        setattr(row, field, row.actual)
+    queryset.model.objects.bulk_update(drifted, [field], batch_size=500)
+    return len(drifted)
+
+
+def reconcile_follows():
+    """Recount the follows of the profiles, return the fixed rows."""
+    return {
+        "followers": _reconcile(
+            Profile.objects.all(),
+            "followers_count",
+            _actual(Follow, "author", outer="user"),
+        ),
+        "following": _reconcile(
+            Profile.objects.all(),
+            "following_count",
+            _actual(Follow, "user", outer="user"),
+        ),
+    }
+
+
+def create_profiles():
+    """Create the profiles of the users created around the signals."""
+    Profile.objects.bulk_create(
+        Profile(user=user) for user in User.objects.filter(profile=None)
+    )
+
+
+def reconcile():
+    """Recount all counters and return the number of fixed rows."""
+    create_profiles()
+    return {
+        "profiles": _reconcile(
+            Profile.objects.all(),
+            "posts_count",
+            _actual(Post, "author", outer="user"),
+        ),
+        "groups": _reconcile(
+            Group.objects.all(), "posts_count", _actual(Post, "group")
+        ),
+        "posts": _reconcile(
+            Post.objects.all(), "comments_count", _actual(Comment, "post")
+        ),
+        **reconcile_follows(),
+    }
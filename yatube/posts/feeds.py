@@ -0,0 +1,24 @@
+"""Querysets of the feeds, shared by the pages and the API."""
+
+from posts.models import Post
+from posts.timeline import home_timeline
+
+
+def latest():
+    """All posts."""
+    return Post.objects.select_related("group", "author")
+
+
+def of_group(group):
+    """Posts of the group."""
+    return group.posts.select_related("group", "author")
+
+
+def of_author(author):
+    """Posts of the author."""
+    return author.posts.select_related("group", "author")
+
+
+def of_followed(user):
+    """Posts of the authors followed by the user, ordered by the timeline."""
+    return home_timeline(user).select_related("group", "author")
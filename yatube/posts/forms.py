@@ -1,9 +1,13 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from posts import images
 from posts.models import Comment, Post
 
 
 class PostForm(forms.ModelForm):
+    variants = None
+
     class Meta:
         model = Post
         fields = ("text", "group", "image")
@@ -23,6 +27,25 @@ class PostForm(forms.ModelForm):
             raise forms.ValidationError("Заполните поле для текста записи")
         return data
 
+    def clean_image(self):
+        """Replace an uploaded image by its cleaned and encoded version."""
+        image = self.cleaned_data["image"]
+        if isinstance(image, UploadedFile):
+            image, self.variants = images.process(image)
+        return image
+
+    def save(self, commit=True):
+        """Store the cards of a new image with the post."""
+        post = super().save(commit=False)
+        if self.variants is not None:
+            name = post.image.field.generate_filename(post, post.image.name)
+            post.image_variants = images.store_variants(self.variants, name)
+        elif not post.image:
+            post.image_variants = ""
+        if commit:
+            post.save()
+        return post
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
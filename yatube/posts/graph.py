@@ -0,0 +1,125 @@
+"""Follow graph of the users.
+
+The ids of the authors a user follows and the number of followers of
+each author are cached, so the pages check follows of many authors at
+once and the follow feed finds the popular authors without reading the
+follows table. The counts come from the counters of the profiles; the
+follow signal handlers drop the entries of both users of a follow.
+Entries read from a replica are kept for ``REPLICA_LAG`` seconds only.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from core import routers
+from posts.models import Follow, Profile
+
+FOLLOWING = "graph:following:{user_id}"
+FOLLOWERS = "graph:followers:{user_id}"
+
+
+def _timeout():
+    """Follows read from a replica may miss the writes of the last seconds."""
+    if routers.replica_used():
+        return settings.REPLICA_LAG
+    return settings.FOLLOW_GRAPH_TIMEOUT
+
+
+def following(user):
+    """Ids of the authors the user follows, none for anonymous users."""
+    if not user.is_authenticated:
+        return frozenset()
+    key = FOLLOWING.format(user_id=user.pk)
+    author_ids = cache.get(key)
+    if author_ids is not None:
+        return author_ids
+    # The follower counts of the authors come with them for the feed
+    counts = dict(
+        Follow.objects.filter(user=user).values_list(
+            "author", "author__profile__followers_count"
+        )
+    )
+    author_ids = frozenset(counts)
+    entries = {
+        FOLLOWERS.format(user_id=author_id): count or 0
+        for author_id, count in counts.items()
+    }
+    entries[key] = author_ids
+    cache.set_many(entries, _timeout())
+    return author_ids
+
+
+def is_following(user, author):
+    return author.pk in following(user)
+
+
+def followed_among(user, author_ids):
+    """Ids of the authors the user follows among the given ones."""
+    return following(user).intersection(author_ids)
+
+
+def mark_followed(user, posts):
+    """Set ``author_followed`` of the posts with one lookup for all.
+
+    It is None for the posts of the user and for anonymous users.
+    """
+    posts = list(posts)
+    followed = followed_among(user, {post.author_id for post in posts})
+    for post in posts:
+        post.author_followed = None
+        if user.is_authenticated and post.author_id != user.pk:
+            post.author_followed = post.author_id in followed
+
+
+def follower_counts(author_ids):
+    """Map the ids of the authors to the numbers of their followers."""
+    keys = {
+        FOLLOWERS.format(user_id=author_id): author_id
+        for author_id in author_ids
+    }
+    cached = cache.get_many(keys)
+    counts = {keys[key]: count for key, count in cached.items()}
+    missing = [
+        author_id for key, author_id in keys.items() if key not in cached
+    ]
+    if missing:
+        found = dict(
+            Profile.objects.filter(user__in=missing).values_list(
+                "user", "followers_count"
+            )
+        )
+        found = {author_id: found.get(author_id, 0) for author_id in missing}
+        cache.set_many(
+            {
+                FOLLOWERS.format(user_id=author_id): count
+                for author_id, count in found.items()
+            },
+            _timeout(),
+        )
+        counts.update(found)
+    return counts
+
+
+def follower_count(author_id):
+    return follower_counts([author_id])[author_id]
+
+
+def forget(*user_ids):
+    """Drop the cached follows and counts of the users.
+
+    They are dropped again after the commit, in case a concurrent
+    request cached the rows the transaction was changing.
+    """
+
+    def drop():
+        cache.delete_many(
+            [
+                key.format(user_id=user_id)
+                for user_id in user_ids
+                for key in (FOLLOWING, FOLLOWERS)
+            ]
+        )
+
+    drop()
+    transaction.on_commit(drop)
@@ -0,0 +1,119 @@
+"""Processing of the uploaded post images.
+
+An upload is decoded once: its byte size and pixel count are checked,
+the EXIF orientation is applied and the metadata dropped, then the
+image is encoded again in ``IMAGE_FORMAT``, no wider than
+``IMAGE_MAX_WIDTH``. The cards of the post are cut from the same decoded
+image in the ``IMAGE_WIDTHS``, so pages list them in ``srcset`` and the
+original is never read again to make a thumbnail.
+"""
+
+import json
+import os
+from collections import namedtuple
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.utils.text import get_valid_filename
+from PIL import Image, ImageOps
+
+from posts.storage import image_storage
+from posts.thumbnails import GEOMETRY
+
+Processed = namedtuple("Processed", ("image", "variants"))
+Variant = namedtuple("Variant", ("width", "height", "content"))
+
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg", "PNG": "png"}
+
+
+def _card_size(width):
+    card_width, card_height = map(int, GEOMETRY.split("x"))
+    return width, round(width * card_height / card_width)
+
+
+def _encode(image):
+    output = BytesIO()
+    image.save(
+        output,
+        settings.IMAGE_FORMAT,
+        quality=settings.IMAGE_QUALITY,
+        optimize=True,
+    )
+    return output.getvalue()
+
+
+def _decode(upload):
+    """Return the upright image without its metadata."""
+    if upload.size > settings.IMAGE_MAX_BYTES:
+        raise ValidationError(
+            "Файл больше %(limit)s МБ",
+            params={"limit": settings.IMAGE_MAX_BYTES // 2**20},
+        )
+    upload.seek(0)
+    try:
+        source = Image.open(upload)
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Загрузите корректное изображение")
+    with source:
+        width, height = source.size
+        if width * height > settings.IMAGE_MAX_PIXELS:
+            raise ValidationError(
+                "Изображение больше %(limit)s мегапикселей",
+                params={"limit": settings.IMAGE_MAX_PIXELS // 10**6},
+            )
+        try:
+            source = ImageOps.exif_transpose(source)
+        except OSError:
+            raise ValidationError("Загрузите корректное изображение")
+        alpha = source.mode in ("RGBA", "LA", "PA") or (
+            source.mode == "P" and "transparency" in source.info
+        )
+        mode = "RGBA" if alpha and settings.IMAGE_FORMAT != "JPEG" else "RGB"
+        converted = source.convert(mode)
+    # A new image carries the pixels only: no EXIF, ICC or comments
+    return Image.frombytes(mode, converted.size, converted.tobytes())
+
+
+def process(upload):
+    """Check, clean and encode the upload and cut the cards from it.
+
+    Raise ``ValidationError`` when the upload is over the limits.
+    """
+    image = _decode(upload)
+    width, height = image.size
+    if width > settings.IMAGE_MAX_WIDTH:
+        image = image.resize(
+            (
+                settings.IMAGE_MAX_WIDTH,
+                round(height * settings.IMAGE_MAX_WIDTH / width),
+            ),
+            Image.LANCZOS,
+        )
+    widths = [w for w in settings.IMAGE_WIDTHS if w <= width] or [
+        min(settings.IMAGE_WIDTHS)
+    ]
+    variants = []
+    for card_width in widths:
+        size = _card_size(card_width)
+        card = ImageOps.fit(image, size, Image.LANCZOS)
+        variants.append(Variant(*size, ContentFile(_encode(card))))
+    root, _ = os.path.splitext(
+        get_valid_filename(os.path.basename(upload.name))
+    )
+    name = f"{root}.{EXTENSIONS[settings.IMAGE_FORMAT]}"
+    return Processed(ContentFile(_encode(image), name=name), variants)
+
+
+def store_variants(variants, image_name):
+    """Save the cards next to the image, return them as JSON."""
+    stem = os.path.splitext(image_name)[0]
+    extension = EXTENSIONS[settings.IMAGE_FORMAT]
+    stored = []
+    for variant in variants:
+        name = image_storage.save(
+            f"{stem}_{variant.width}w.{extension}", variant.content
+        )
+        stored.append([variant.width, variant.height, name])
+    return json.dumps(stored)
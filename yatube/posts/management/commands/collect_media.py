@@ -0,0 +1,79 @@
+"""Delete the post images no post refers to any more."""
+
+import json
+import posixpath
+import time
+
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import delete
+
+from posts.models import Post
+from posts.thumbnails import source
+
+
+def stored_files(storage, directory):
+    """Names of the files in the directory and its subdirectories."""
+    directories, files = storage.listdir(directory)
+    for name in files:
+        yield posixpath.join(directory, name)
+    for subdirectory in directories:
+        yield from stored_files(
+            storage, posixpath.join(directory, subdirectory)
+        )
+
+
+def referenced_files():
+    """Names of the images and cards the posts refer to."""
+    names = set()
+    rows = Post.objects.exclude(image="").values_list(
+        "image", "image_variants"
+    )
+    for image, variants in rows.order_by().iterator():
+        names.add(image)
+        if variants:
+            names.update(name for _, _, name in json.loads(variants))
+    return names
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the stored post images and cards that no post refers to "
+        "after edits and deletes, with their thumbnails."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=3600,
+            help="Keep files changed in the last seconds: their posts "
+            "may be saved yet.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the files without deleting them.",
+        )
+
+    def handle(self, *args, **options):
+        storage = Post.image.field.storage
+        directory = Post.image.field.upload_to.rstrip("/")
+        names = stored_files(storage, directory)
+        if not storage.exists(directory):
+            names = []
+        keep = referenced_files()
+        changed_after = time.time() - options["grace"]
+        deleted = size = 0
+        for name in names:
+            if name in keep:
+                continue
+            if storage.get_modified_time(name).timestamp() > changed_after:
+                continue
+            if options["verbosity"] > 1 or options["dry_run"]:
+                self.stdout.write(name)
+            size += storage.size(name)
+            if not options["dry_run"]:
+                delete(source(name))
+            deleted += 1
+        verb = "Found" if options["dry_run"] else "Deleted"
+        self.stdout.write(f"{verb} {deleted} orphaned files, {size} bytes")
@@ -0,0 +1,193 @@
+"""Fill the database with synthetic data at production scale."""
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from posts import graph, search, synthetic, thumbnails
+from posts.counters import create_profiles, reconcile, reconcile_follows
+from posts.models import Comment, Follow, Group, Post, User
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max("id"))["top"] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate users, groups, follows, posts and comments with a "
+        "power-law follower graph and skewed group sizes. The same seed "
+        "generates the same rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--groups", type=int, default=100)
+        parser.add_argument("--posts", type=int, default=1000000)
+        parser.add_argument("--comments", type=int, default=1000000)
+        parser.add_argument(
+            "--follows",
+            type=int,
+            default=50,
+            help="Average number of authors a user follows.",
+        )
+        parser.add_argument(
+            "--alpha",
+            type=float,
+            default=1.0,
+            help="Exponent of the power law of the popularity.",
+        )
+        parser.add_argument(
+            "--images",
+            type=float,
+            default=0.0,
+            help="Share of the posts with an image, from 0 to 1.",
+        )
+        parser.add_argument(
+            "--image-files",
+            type=int,
+            default=20,
+            help="Number of distinct images the posts refer to.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="The posts are published over the days before 2024-01-01.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--prefix",
+            default="synthetic",
+            help="Prefix of the usernames and group slugs.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help=(
+                "Number of processes building the rows, 0 builds them in "
+                "this process. The rows are inserted by this process."
+            ),
+        )
+        parser.add_argument(
+            "--no-timelines",
+            action="store_true",
+            help="Do not fill the home timelines of the followers.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Users named {prefix}* exist, choose another --prefix"
+            )
+        image_names = []
+        if options["images"] > 0:
+            image_names = synthetic.create_images(
+                options["seed"], prefix, options["image_files"]
+            )
+        start = synthetic.EPOCH - timedelta(days=options["days"])
+        plan = synthetic.Plan(
+            seed=options["seed"],
+            prefix=prefix,
+            users=options["users"],
+            groups=options["groups"],
+            posts=options["posts"],
+            comments=options["comments"],
+            follows=options["follows"],
+            alpha=options["alpha"],
+            images=options["images"],
+            image_names=image_names,
+            start=start,
+            step=options["days"] * 24 * 3600 / max(options["posts"], 1),
+            user_base=next_id(User),
+            group_base=next_id(Group),
+            post_base=next_id(Post),
+        )
+        stages = list(synthetic.STAGES)
+        if options["no_timelines"]:
+            stages.remove("timelines")
+        self.workers = options["workers"]
+        if self.workers:
+            connections.close_all()
+            with ProcessPoolExecutor(self.workers) as pool:
+                for stage in stages:
+                    self.run_stage(plan, stage, pool)
+        else:
+            for stage in stages:
+                self.run_stage(plan, stage, None)
+        self.finish()
+
+    def run_stage(self, plan, stage, pool):
+        """Insert the chunks of the stage and report the progress."""
+        total = synthetic.stage_size(plan, stage)
+        done = 0
+        # The timelines are built from the rows of the database, reads of
+        # other processes would wait for the inserts of this one
+        if pool is None or stage == "timelines":
+            built = (
+                (stop - start, synthetic.build(plan, stage, start, stop))
+                for start, stop in synthetic.chunks(plan, stage)
+            )
+        else:
+            built = self.build_in_pool(plan, stage, pool)
+        for items, rows in built:
+            synthetic.insert(rows)
+            done += items
+            self.stdout.write(f"{stage}: {done}/{total}")
+        if stage == "follows":
+            # The timelines stage finds the pulled authors by the counters
+            # of the profiles, read through the follow graph cache
+            with transaction.atomic():
+                create_profiles()
+                reconcile_follows()
+            graph.forget(*range(plan.user_base, plan.user_base + plan.users))
+            connections.close_all()
+
+    def build_in_pool(self, plan, stage, pool):
+        """Yield the number of items and the rows of the built chunks.
+
+        The workers build at most two chunks each ahead of the inserts,
+        so the rows waiting for them stay few.
+        """
+        bounds = iter(synthetic.chunks(plan, stage))
+        pending = {}
+        while True:
+            ahead = 2 * self.workers - len(pending)
+            for start, stop in islice(bounds, ahead):
+                job = pool.submit(synthetic.build, plan, stage, start, stop)
+                pending[job] = stop - start
+            if not pending:
+                return
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for job in finished:
+                yield pending.pop(job), job.result()
+
+    def finish(self):
+        """Fix the sequences of the ids, recount the counters and index.
+
+        ``bulk_create`` does not send the signals that keep them. The
+        images get their cards here, the pages never queue thumbnails.
+        """
+        models = [User, Group, Post, Follow, Comment]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        with transaction.atomic():
+            fixed = reconcile()
+        with transaction.atomic():
+            for indexed in search.rebuild():
+                self.stdout.write(f"search: {indexed} posts indexed")
+        for name in list(thumbnails.missing()):
+            thumbnails.generate(name)
+            self.stdout.write(f"thumbnails: {name}")
+        self.stdout.write(
+            f"Recounted {sum(fixed.values())} rows, "
+            f"{Post.objects.count()} posts in total"
+        )
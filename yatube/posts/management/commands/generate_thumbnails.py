@@ -0,0 +1,62 @@
+"""Generate the thumbnails of the post images without cards."""
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from sorl.thumbnail import delete
+
+from posts.models import Post
+from posts.thumbnails import drop_cards, generate, missing, source
+
+
+def regenerate(name, force):
+    with transaction.atomic():
+        if force:
+            delete(source(name), delete_file=False)
+            drop_cards(name)
+        generate(name)
+    return name
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the thumbnails of the post images in parallel and store "
+        "them as the cards of the posts without cards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Recreate the thumbnails of all the images and their cards.",
+        )
+
+    def handle(self, *args, **options):
+        names = missing()
+        if options["force"]:
+            names = (
+                Post.objects.exclude(image="")
+                .order_by()
+                .values_list("image", flat=True)
+                .distinct()
+            )
+        names = list(names)
+        connections.close_all()
+        done = 0
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            jobs = [
+                pool.submit(regenerate, name, options["force"])
+                for name in names
+            ]
+            for job in as_completed(jobs):
+                try:
+                    job.result()
+                except Exception as error:
+                    self.stderr.write(f"{error}")
+                    continue
+                done += 1
+                if done % 100 == 0:
+                    self.stdout.write(f"{done}/{len(names)}")
+        self.stdout.write(f"Generated thumbnails of {done} images")
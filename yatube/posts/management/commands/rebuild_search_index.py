@@ -0,0 +1,25 @@
+"""Index the texts of all posts for the full-text search."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the posts in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=search.BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if not search.available():
+            self.stdout.write("The database has no full-text index")
+            return
+        done = 0
+        with transaction.atomic():
+            for done in search.rebuild(options["batch_size"]):
+                self.stdout.write(f"Indexed {done} posts")
+        self.stdout.write(f"Indexed {done} posts in total")
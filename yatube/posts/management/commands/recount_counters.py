@@ -0,0 +1,19 @@
+"""Fix the drift of the denormalized post, comment and follow counters."""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the post and follow counters of users, the post "
+        "counters of groups and the comment counters of posts."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            fixed = reconcile()
+        for name, rows in fixed.items():
+            self.stdout.write(f"{name}: fixed {rows} rows")
@@ -0,0 +1,90 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_timelines(apps, schema_editor):
+    """Push the latest posts of the authors into their followers' inboxes.
+
+    Posts of the authors over the fan-out limit are pulled by the feed,
+    so their followers get no entries; the others get as many posts as
+    a new follow does.
+    """
+    Follow = apps.get_model("posts", "Follow")
+    Post = apps.get_model("posts", "Post")
+    TimelineEntry = apps.get_model("posts", "TimelineEntry")
+    authors = (
+        Follow.objects.values("author")
+        .annotate(followers=models.Count("id"))
+        .filter(followers__lte=settings.TIMELINE_FANOUT_LIMIT)
+        .values_list("author", flat=True)
+    )
+    entries = []
+    for author_id in list(authors):
+        post_ids = list(
+            Post.objects.filter(author_id=author_id)
+            .order_by("-pub_date", "-id")
+            .values_list("id", flat=True)[: settings.TIMELINE_BACKFILL_LIMIT]
+        )
+        followers = Follow.objects.filter(author_id=author_id).values_list(
+            "user", flat=True
+        )
+        for user_id in followers:
+            entries.extend(
+                TimelineEntry(user_id=user_id, post_id=post_id)
+                for post_id in post_ids
+            )
+            if len(entries) >= settings.TIMELINE_BATCH_SIZE:
+                TimelineEntry.objects.bulk_create(entries)
+                entries = []
+    TimelineEntry.objects.bulk_create(entries)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("posts", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TimelineEntry",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "post",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline_entries",
+                        to="posts.Post",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="timeline",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="timelineentry",
+            constraint=models.UniqueConstraint(
+                fields=("user", "post"), name="unique_timeline_entry"
+            ),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0007_post_fts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="post",
+            name="image_variants",
+            field=models.TextField(blank=True, default="", editable=False),
+        ),
+    ]
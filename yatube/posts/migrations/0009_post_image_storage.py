@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:50
+
+from django.db import migrations, models
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0008_post_image_variants"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                storage=posts.storage.ContentAddressedStorage(),
+                upload_to="posts/",
+            ),
+        ),
+    ]
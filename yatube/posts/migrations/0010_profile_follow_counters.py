@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-17 06:58
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_counters(apps, schema_editor):
+    Follow = apps.get_model("posts", "Follow")
+    Profile = apps.get_model("posts", "Profile")
+    for field, column in (
+        ("followers_count", "author"),
+        ("following_count", "user"),
+    ):
+        totals = Follow.objects.values(column).annotate(total=Count("id"))
+        for row in totals.order_by():
+            Profile.objects.filter(user_id=row[column]).update(
+                **{field: row["total"]}
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0009_post_image_storage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="profile",
+            name="followers_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="profile",
+            name="following_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.16 on 2026-10-17 07:46
+
+from django.db import migrations, models
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("posts", "0010_profile_follow_counters"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="post",
+            name="image",
+            field=models.ImageField(
+                blank=True,
+                db_index=True,
+                storage=posts.storage.ContentAddressedStorage(),
+                upload_to="posts/",
+            ),
+        ),
+    ]
@@ -1,8 +1,12 @@
 """Database settings of the 'Posts' application."""
 
+import json
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+
+from posts.storage import image_storage
 
 User = get_user_model()
 
@@ -13,16 +17,34 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(default=0, editable=False)
 
     def __str__(self):
         return self.title
 
 
+class Profile(models.Model):
+    """Table settings for the counters of a user."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name="profile",
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.user.username
+
+
 class Post(models.Model):
     """Table settings for user posts."""
 
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated = models.DateTimeField(auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -38,13 +60,54 @@ class Post(models.Model):
     image = models.ImageField(
         upload_to="posts/",
         blank=True,
+        storage=image_storage,
+        db_index=True,
     )
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+    # Cards cut from the image at upload or its generated thumbnail:
+    # JSON list of [width, height, file name]
+    image_variants = models.TextField(blank=True, default="", editable=False)
 
     def __str__(self):
         return self.text[: settings.NUM_CHAR]
 
+    def save(self, *args, **kwargs):
+        """Save in one transaction with the counter updates."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @property
+    def cards(self):
+        """Width, height and URL of the image cards, the narrowest first."""
+        if not self.image_variants:
+            return []
+        return [
+            {
+                "width": width,
+                "height": height,
+                "url": self.image.storage.url(name),
+            }
+            for width, height, name in json.loads(self.image_variants)
+        ]
+
+    @property
+    def srcset(self):
+        return ", ".join(
+            f"{card['url']} {card['width']}w" for card in self.cards
+        )
+
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_pub_date_idx",
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_pub_date_idx",
+            ),
+        ]
 
 
 class Comment(models.Model):
@@ -66,6 +129,18 @@ class Comment(models.Model):
     def __str__(self):
         return self.text[: settings.NUM_CHAR]
 
+    def save(self, *args, **kwargs):
+        """Save in one transaction with the counter updates."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["post", "created"], name="comment_post_created_idx"
+            ),
+        ]
+
 
 class Follow(models.Model):
     """Table settings for user subscriptions."""
@@ -87,3 +162,37 @@ class Follow(models.Model):
                 fields=["user", "author"], name="unique_follow"
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "user"], name="follow_author_user_idx"
+            ),
+        ]
+
+
+class TimelineEntry(models.Model):
+    """Table settings for posts delivered to the home timeline of a user."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"], name="unique_timeline_entry"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_pub_date_idx",
+            ),
+        ]
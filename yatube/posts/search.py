@@ -0,0 +1,166 @@
+"""Full-text search over the posts.
+
+The texts of the posts are copied to the ``posts_post_fts`` FTS5 table
+by the signal handlers, under the ids of the posts. The search ranks
+the matches by BM25 and highlights the matched words in a snippet.
+Databases other than SQLite fall back to ``icontains``.
+"""
+
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from posts.models import Post
+
+TABLE = "posts_post_fts"
+BATCH_SIZE = 1000
+SNIPPET_WORDS = 24
+
+# Bounds of the highlighted words in the snippets, escaped separately
+_START, _END = "\x02", "\x03"
+
+_WORD = re.compile(r"\w+")
+
+
+def available():
+    return connection.vendor == "sqlite"
+
+
+def match_expression(query):
+    """Turn the words of the query into an FTS5 expression.
+
+    Every word has to be found, as a prefix of a word of the post; the
+    operators and quotes of the query are not interpreted.
+    """
+    return " ".join(f'"{word}"*' for word in _WORD.findall(query))
+
+
+def index(post):
+    """Add or replace the text of the post in the index."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post.pk])
+        cursor.execute(
+            f"INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)",
+            [post.pk, post.text],
+        )
+
+
+def remove(post_id):
+    """Remove the post from the index."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid = %s", [post_id])
+
+
+def rebuild(batch_size=BATCH_SIZE):
+    """Index all posts again, yielding the number of indexed posts."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    posts = Post.objects.order_by("id").values_list("id", "text")
+    done = 0
+    last_id = 0
+    while True:
+        batch = list(posts.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {TABLE} (rowid, text) VALUES (%s, %s)", batch
+            )
+        done += len(batch)
+        last_id = batch[-1][0]
+        yield done
+
+
+def matching_ids(query):
+    """Return the SQL selecting the ids of the matching posts and its params.
+
+    Used to filter querysets: ``filter(id__in=RawSQL(*matching_ids(q)))``.
+    """
+    return (
+        f"SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s",
+        (match_expression(query),),
+    )
+
+
+def _highlight(snippet):
+    snippet = escape(snippet)
+    return mark_safe(
+        snippet.replace(_START, "<mark>").replace(_END, "</mark>")
+    )
+
+
+class SearchResults:
+    """Posts matching the query, the most relevant first.
+
+    Works as the object list of a ``Paginator``: the matches are counted
+    and sliced in the index, only the posts of the page are loaded. Each
+    post gets the ``snippet`` with the matched words highlighted.
+    """
+
+    def __init__(self, query):
+        self.query = query
+        self.expression = match_expression(query)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            if not self.expression:
+                self._count = 0
+            elif available():
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT COUNT(*) FROM {TABLE} WHERE {TABLE} MATCH %s",
+                        [self.expression],
+                    )
+                    (self._count,) = cursor.fetchone()
+            else:
+                self._count = self._fallback().count()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not self.expression:
+            return []
+        if not available():
+            posts = list(self._fallback()[page])
+            for post in posts:
+                post.snippet = post.text[:200]
+            return posts
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid, snippet({TABLE}, 0, %s, %s, '…', %s) "
+                f"FROM {TABLE} WHERE {TABLE} MATCH %s "
+                "ORDER BY rank, rowid DESC LIMIT %s OFFSET %s",
+                [
+                    _START,
+                    _END,
+                    SNIPPET_WORDS,
+                    self.expression,
+                    page.stop - page.start,
+                    page.start,
+                ],
+            )
+            snippets = dict(cursor.fetchall())
+        posts = Post.objects.select_related("author", "group").in_bulk(
+            list(snippets)
+        )
+        results = []
+        for post_id, snippet in snippets.items():
+            if post_id in posts:
+                post = posts[post_id]
+                post.snippet = _highlight(snippet)
+                results.append(post)
+        return results
+
+    def _fallback(self):
+        return Post.objects.filter(text__icontains=self.query.strip())
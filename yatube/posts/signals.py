@@ -0,0 +1,191 @@
+"""Signal handlers of the 'Posts' application."""
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.tasks import enqueue
+from posts import cache, counters, graph, search, tasks, timeline
+from posts.models import Comment, Follow, Group, Post, Profile, User
+from posts.storage import stored_name
+
+
+@receiver(pre_save, sender=User)
+def user_saving(sender, instance, update_fields, **kwargs):
+    instance.previous_username = None
+    if instance._state.adding or update_fields == frozenset({"last_login"}):
+        return
+    instance.previous_username = (
+        User.objects.filter(pk=instance.pk)
+        .values_list("username", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, update_fields, **kwargs):
+    if created:
+        Profile.objects.get_or_create(user=instance)
+        graph.forget(instance.pk)
+    elif update_fields != frozenset({"last_login"}):
+        # The cards of the author are shown on the pages of the groups too
+        slugs = (
+            Group.objects.filter(posts__author=instance)
+            .values_list("slug", flat=True)
+            .distinct()
+        )
+        usernames = {instance.username, instance.previous_username}
+        cache.bump(
+            cache.POSTS,
+            *(
+                cache.AUTHOR.format(username=username)
+                for username in usernames - {None}
+            ),
+            *(cache.GROUP.format(slug=slug) for slug in slugs),
+        )
+
+
+@receiver(pre_save, sender=Group)
+def group_saving(sender, instance, **kwargs):
+    instance.previous_slug = None
+    if not instance._state.adding:
+        instance.previous_slug = (
+            Group.objects.filter(pk=instance.pk)
+            .values_list("slug", flat=True)
+            .first()
+        )
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    slugs = {instance.slug, instance.previous_slug} - {None}
+    scopes = [cache.GROUPS, *(cache.GROUP.format(slug=slug) for slug in slugs)]
+    if not created:
+        # The title and the link of the group are shown under its posts
+        usernames = (
+            User.objects.filter(posts__group=instance)
+            .values_list("username", flat=True)
+            .distinct()
+        )
+        scopes.append(cache.POSTS)
+        scopes.extend(
+            cache.AUTHOR.format(username=username) for username in usernames
+        )
+    cache.bump(*scopes)
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    cache.bump(
+        cache.POSTS, cache.GROUPS, cache.GROUP.format(slug=instance.slug)
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_saving(sender, instance, **kwargs):
+    instance.previous_group_id = None
+    if instance._state.adding:
+        return
+    previous = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list("group", "image", "image_variants")
+        .first()
+    )
+    if previous is None:
+        return
+    instance.previous_group_id, image, variants = previous
+    # Cards of a replaced image, e.g. changed in the admin, are dropped;
+    # the same picture uploaded again keeps them
+    replaced = stored_name(instance.image) != image
+    if replaced and instance.image_variants == variants:
+        instance.image_variants = ""
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    search.index(instance)
+    if created:
+        counters.change_author(instance.author_id, 1)
+        counters.change(
+            Group.objects.filter(pk=instance.group_id), "posts_count", 1
+        )
+        enqueue(tasks.fan_out, instance.pk)
+        cache.bump(*cache.post_scopes(instance))
+    elif instance.previous_group_id != instance.group_id:
+        counters.change(
+            Group.objects.filter(pk=instance.previous_group_id),
+            "posts_count",
+            -1,
+        )
+        counters.change(
+            Group.objects.filter(pk=instance.group_id), "posts_count", 1
+        )
+        previous_group = Group.objects.filter(
+            pk=instance.previous_group_id
+        ).first()
+        cache.bump(*cache.post_scopes(instance, previous_group))
+    else:
+        cache.bump(*cache.post_scopes(instance))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    search.remove(instance.pk)
+    counters.change(
+        Profile.objects.filter(user=instance.author_id), "posts_count", -1
+    )
+    counters.change(
+        Group.objects.filter(pk=instance.group_id), "posts_count", -1
+    )
+    cache.bump(*cache.post_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.change(
+            Post.objects.filter(pk=instance.post_id), "comments_count", 1
+        )
+        cache.bump(cache.POST.format(post_id=instance.post_id))
+        enqueue(tasks.notify_comment, instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    counters.change(
+        Post.objects.filter(pk=instance.post_id), "comments_count", -1
+    )
+    cache.bump(cache.POST.format(post_id=instance.post_id))
+
+
+def _follows_changed(follow, delta):
+    """Count the follow and return the new number of author followers."""
+    counters.change_follows(follow.user_id, follow.author_id, delta)
+    graph.forget(follow.user_id, follow.author_id)
+    users = User.objects.filter(
+        pk__in=(follow.user_id, follow.author_id)
+    ).values_list("pk", "username", "profile__followers_count")
+    followers = None
+    scopes = [cache.FOLLOWER.format(user_id=follow.user_id)]
+    for pk, username, count in users:
+        scopes.append(cache.AUTHOR.format(username=username))
+        if pk == follow.author_id:
+            followers = count
+    cache.bump(*scopes)
+    return followers
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        enqueue(tasks.backfill, instance.pk)
+        _follows_changed(instance, 1)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    timeline.prune(instance.user, instance.author)
+    followers = _follows_changed(instance, -1)
+    if followers == settings.TIMELINE_FANOUT_LIMIT:
+        # The author is pushed again, the posts written while pulled are not
+        enqueue(tasks.repush, instance.author_id, unique=True)
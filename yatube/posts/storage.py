@@ -0,0 +1,62 @@
+"""Storage of the post images keeping every distinct content once.
+
+A file is saved under the SHA-256 of its content, so the same picture
+posted again refers to the stored file and its thumbnails. Files are
+never deleted when their posts change: the ``collect_media`` command
+removes the files no post refers to any more.
+"""
+
+import hashlib
+import os
+import posixpath
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage naming the files by the hash of the content.
+
+    ``posts/photo.jpg`` is stored as ``posts/<h[:2]>/<h>.jpg``.
+    """
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        directory, basename = posixpath.split(name)
+        extension = posixpath.splitext(basename)[1].lower()
+        return posixpath.join(directory, digest[:2], digest + extension)
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+        name = self.content_name(name, content)
+        if self.exists(name):
+            # A fresh time keeps the file from being collected as an
+            # orphan before the post referring to it is saved
+            os.utime(self.path(name))
+            return name
+        return super().save(name, content, max_length)
+
+
+image_storage = ContentAddressedStorage()
+
+
+def stored_name(field_file):
+    """Return the name the file of an image field is stored under.
+
+    A file not saved yet gets the name of its content, so a picture
+    uploaded again is recognized before it is saved.
+    """
+    if not field_file or field_file._committed:
+        return field_file.name
+    name = field_file.field.generate_filename(
+        field_file.instance, field_file.name
+    )
+    return field_file.storage.content_name(name, field_file.file)
@@ -0,0 +1,275 @@
+"""Synthetic posts, comments, follows and groups for scale testing.
+
+The rows are built in chunks of ``CHUNK_SIZE``, each chunk with its own
+random generator seeded by the seed of the run, the stage and the
+position of the chunk. So the same seed gives the same rows whatever
+the number of worker processes and the order the chunks finish in. The
+workers only build the rows, one process inserts them and builds the
+timelines from the database: SQLite has a single writer, concurrent
+inserts fail on its lock.
+
+Authors are followed with a power-law (Zipf) popularity, the popular
+authors also write more posts and the posts get comments by the same
+law, the sizes of the groups are skewed too. The rows are inserted by
+``bulk_create`` with their ids, so the chunks of one stage refer to
+the rows of the previous stages without reading them back.
+"""
+
+import bisect
+import io
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.core.files.base import ContentFile
+from django.db import transaction
+from faker import Faker
+from PIL import Image
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry, User
+from posts.storage import image_storage
+from posts.timeline import is_pulled
+
+CHUNK_SIZE = 5000
+# Chunks of followers are smaller: a follower brings many rows
+FOLLOWER_CHUNK_SIZE = 200
+INBOX_CHUNK_SIZE = 20
+BATCH_SIZE = 500
+STAGES = ("users", "groups", "follows", "posts", "comments", "timelines")
+
+# Share of the posts published outside of the groups
+NO_GROUP = 0.3
+
+# The posts are published before this date rather than the time of the
+# run, so their dates depend on the seed only
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+Plan = namedtuple(
+    "Plan",
+    (
+        "seed",
+        "prefix",
+        "users",
+        "groups",
+        "posts",
+        "comments",
+        "follows",
+        "alpha",
+        "images",
+        "image_names",
+        "start",
+        "step",
+        "user_base",
+        "group_base",
+        "post_base",
+    ),
+)
+
+
+def stage_size(plan, stage):
+    """Return the number of items the chunks of the stage go through.
+
+    Follows and timelines are built per follower.
+    """
+    if stage in ("follows", "timelines"):
+        return plan.users
+    return getattr(plan, stage)
+
+
+def chunks(plan, stage):
+    """Return the bounds of the chunks of the stage."""
+    size = stage_size(plan, stage)
+    step = CHUNK_SIZE
+    if stage == "follows":
+        step = FOLLOWER_CHUNK_SIZE
+    if stage == "timelines":
+        step = INBOX_CHUNK_SIZE
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+
+@lru_cache(maxsize=8)
+def zipf(count, alpha):
+    """Return the cumulative weights of the ranks ``1..count``."""
+    weights = []
+    total = 0.0
+    for rank in range(1, count + 1):
+        total += rank**-alpha
+        weights.append(total)
+    return weights
+
+
+def pick(rng, weights):
+    """Return the index chosen by the cumulative weights."""
+    return bisect.bisect(weights, rng.random() * weights[-1])
+
+
+@lru_cache(maxsize=1)
+def _faker():
+    return Faker("ru_RU")
+
+
+def _generators(plan, stage, start):
+    rng = random.Random(f"{plan.seed}:{stage}:{start}")
+    fake = _faker()
+    fake.seed_instance(f"{plan.seed}:{stage}:{start}")
+    return rng, fake
+
+
+def build(plan, stage, start, stop):
+    """Return the unsaved rows of the chunk of the stage.
+
+    Only the timelines are read from the database, the other stages
+    are built in any process.
+    """
+    if stage == "timelines":
+        return _timelines(plan, start, stop)
+    rng, fake = _generators(plan, stage, start)
+    if stage == "users":
+        return [
+            User(
+                id=plan.user_base + number,
+                username=f"{plan.prefix}{number}",
+                first_name=fake.first_name(),
+                last_name=fake.last_name(),
+                password=UNUSABLE_PASSWORD_PREFIX,
+            )
+            for number in range(start, stop)
+        ]
+    if stage == "groups":
+        return [
+            Group(
+                id=plan.group_base + number,
+                title=fake.sentence(nb_words=3)[:200],
+                slug=f"{plan.prefix}-group-{number}",
+                description=fake.paragraph(),
+            )
+            for number in range(start, stop)
+        ]
+    if stage == "follows":
+        return _follows(plan, rng, start, stop)
+    if stage == "posts":
+        return _posts(plan, rng, fake, start, stop)
+    if stage == "comments":
+        posts = zipf(plan.posts, plan.alpha)
+        return [
+            Comment(
+                post_id=plan.post_base + pick(rng, posts),
+                author_id=plan.user_base + rng.randrange(plan.users),
+                text=fake.sentence(),
+            )
+            for _ in range(start, stop)
+        ]
+    raise ValueError(f"Rows of the {stage} stage are not built")
+
+
+def _follows(plan, rng, start, stop):
+    authors = zipf(plan.users, plan.alpha)
+    follows = []
+    for number in range(start, stop):
+        wanted = min(rng.randint(0, 2 * plan.follows), plan.users - 1)
+        followed = set()
+        # The popular authors are picked again and again, so a follower of
+        # almost everybody may get fewer follows than wanted
+        for _ in range(wanted * 10):
+            if len(followed) == wanted:
+                break
+            author = pick(rng, authors)
+            if author != number:
+                followed.add(author)
+        follows.extend(
+            Follow(
+                user_id=plan.user_base + number,
+                author_id=plan.user_base + author,
+            )
+            for author in sorted(followed)
+        )
+    return follows
+
+
+def _posts(plan, rng, fake, start, stop):
+    authors = zipf(plan.users, plan.alpha)
+    groups = zipf(plan.groups, plan.alpha) if plan.groups else None
+    posts = []
+    for number in range(start, stop):
+        group_id = None
+        if groups and rng.random() >= NO_GROUP:
+            group_id = plan.group_base + pick(rng, groups)
+        image = ""
+        if plan.image_names and rng.random() < plan.images:
+            image = rng.choice(plan.image_names)
+        posts.append(
+            Post(
+                id=plan.post_base + number,
+                author_id=plan.user_base + pick(rng, authors),
+                group_id=group_id,
+                text=fake.paragraph(nb_sentences=rng.randint(1, 8)),
+                image=image,
+                pub_date=plan.start + timedelta(seconds=plan.step * number),
+            )
+        )
+    return posts
+
+
+def insert(rows):
+    """Insert the rows of a chunk in one transaction."""
+    if not rows:
+        return
+    model = type(rows[0])
+    # bulk_create sets the dates of auto_now_add fields to the current time
+    dates = [getattr(row, "pub_date", None) for row in rows]
+    with transaction.atomic():
+        model.objects.bulk_create(
+            rows,
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=model is TimelineEntry,
+        )
+        if model is Post:
+            for post, pub_date in zip(rows, dates):
+                post.pub_date = pub_date
+            Post.objects.bulk_update(rows, ["pub_date"], batch_size=BATCH_SIZE)
+
+
+def _timelines(plan, start, stop):
+    """Fill the inboxes of the followers like new follows do.
+
+    The latest posts of an author are read once per chunk.
+    """
+    follows = Follow.objects.filter(
+        user_id__gte=plan.user_base + start,
+        user_id__lt=plan.user_base + stop,
+    ).values_list("user_id", "author_id")
+    latest = {}
+    entries = []
+    for user_id, author_id in follows:
+        if author_id not in latest:
+            latest[author_id] = _latest_posts(author_id)
+        entries.extend(
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=date)
+            for post_id, date in latest[author_id]
+        )
+    return entries
+
+
+def _latest_posts(author_id):
+    if is_pulled(author_id):
+        return []
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "id", "pub_date"
+    )
+    return list(posts[: settings.TIMELINE_BACKFILL_LIMIT])
+
+
+def create_images(seed, prefix, count):
+    """Save the images the posts refer to and return their names."""
+    rng = random.Random(f"{seed}:images")
+    names = []
+    for number in range(count):
+        color = tuple(rng.randrange(256) for _ in range(3))
+        content = io.BytesIO()
+        Image.new("RGB", (1200, 800), color).save(content, "JPEG")
+        name = f"posts/{prefix}-{number}.jpg"
+        names.append(image_storage.save(name, ContentFile(content.getvalue())))
+    return names
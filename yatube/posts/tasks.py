@@ -0,0 +1,57 @@
+"""Side effects of the writes of the posts, run by the task queue."""
+
+from django.core.mail import send_mail
+
+from core.tasks import task
+from posts import timeline
+from posts.models import Comment, Follow, Post, User
+
+
+@task
+def fan_out(post_id):
+    """Push the new post into the inboxes of the followers."""
+    post = Post.objects.select_related("author").filter(pk=post_id).first()
+    if post is not None:
+        timeline.fan_out(post)
+
+
+@task
+def backfill(follow_id):
+    """Fill the inbox of the new follower who still follows the author."""
+    follow = (
+        Follow.objects.select_related("user", "author")
+        .filter(pk=follow_id)
+        .first()
+    )
+    if follow is not None:
+        timeline.backfill(follow.user, follow.author)
+
+
+@task
+def repush(author_id):
+    """Fill the inboxes of the followers of an author pushed again."""
+    author = User.objects.filter(pk=author_id).first()
+    if author is not None:
+        timeline.repush(author)
+
+
+@task
+def notify_comment(comment_id):
+    """Send the new comment to the author of the post by email."""
+    comment = (
+        Comment.objects.select_related("author", "post__author")
+        .filter(pk=comment_id)
+        .first()
+    )
+    if comment is None:
+        return
+    recipient = comment.post.author
+    if not recipient.email or recipient == comment.author:
+        return
+    commenter = comment.author.get_full_name() or comment.author.username
+    send_mail(
+        f"Новый комментарий к посту «{comment.post}»",
+        f"{commenter}: {comment.text}",
+        None,
+        [recipient.email],
+    )
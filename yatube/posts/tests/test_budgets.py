@@ -0,0 +1,199 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from core.models import Task
+from core.testing import BudgetTestMixin
+from posts.models import Comment, Follow, Group, Post
+from posts.thumbnails import generate
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class BudgetTests(BudgetTestMixin, TestCase):
+    """Every view of the posts stays within its budget.
+
+    The pages are filled with more posts and comments than fit on one
+    page, so a query run per post or per comment exceeds the budget.
+    The latest post has an image without cards, like the posts of the
+    other tests.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(
+            username="Author", first_name="Имя", last_name="Фамилия"
+        )
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for number in range(settings.NUM_POSTS * 2):
+            cls.post = Post.objects.create(
+                text=f"Пост {number}", author=cls.author, group=cls.group
+            )
+        for author in (cls.user, cls.author) * settings.NUM_COMMENTS:
+            Comment.objects.create(
+                text="Комментарий", author=author, post=cls.post
+            )
+        cls.other_group = Group.objects.create(
+            title="Другая группа", slug="other-slug"
+        )
+        image = BytesIO()
+        Image.new("RGB", (100, 50), color=(255, 0, 0)).save(image, "png")
+        cls.image_post = Post.objects.create(
+            text="Пост с картинкой",
+            author=cls.author,
+            group=cls.group,
+            image=SimpleUploadedFile("image.png", image.getvalue()),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(BudgetTests.user)
+        self.author_client = Client()
+        self.author_client.force_login(BudgetTests.author)
+
+    def pages(self):
+        return (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:post_detail", args=(self.post.id,)),
+            reverse("posts:post_detail", args=(self.image_post.id,)),
+            reverse("posts:post_comments", args=(self.post.id,)),
+            reverse("posts:post_create"),
+            reverse("posts:post_edit", args=(self.post.id,)),
+            reverse("posts:follow_index"),
+            f"{reverse('posts:search')}?q=Пост",
+        )
+
+    def test_pages_within_budget(self):
+        """The pages missing the cache stay within their budgets."""
+        for url in self.pages():
+            with self.subTest(url=url):
+                cache.clear()
+                self.assertWithinBudget(self.author_client.get(url))
+                cache.clear()
+                self.assertWithinBudget(self.authorized_client.get(url))
+
+    def test_standard_requests_log_no_warning(self):
+        """The requests of a signed-in user log no budget warnings."""
+        with mock.patch("core.middleware.logger") as logger:
+            for url in self.pages():
+                cache.clear()
+                self.authorized_client.get(url)
+            self.check_writes()
+        logger.warning.assert_not_called()
+
+    def test_writes_within_budget(self):
+        """Creating posts and comments and following stay within budgets.
+
+        The side effects are run by the request in the tests, so the
+        budgets hold in every mode of the task queue.
+        """
+        for mode in ("worker", "eager"):
+            with self.subTest(mode=mode), override_settings(TASKS_MODE=mode):
+                self.check_writes()
+
+    def check_writes(self):
+        requests = (
+            (
+                reverse("posts:post_create"),
+                {"text": "Новый пост", "group": self.group.id},
+            ),
+            (
+                reverse("posts:post_edit", args=(self.post.id,)),
+                {"text": "Изменённый пост", "group": self.other_group.id},
+            ),
+            (
+                reverse("posts:add_comment", args=(self.post.id,)),
+                {"text": "Новый комментарий"},
+            ),
+        )
+        for url, data in requests:
+            with self.subTest(url=url):
+                self.assertWithinBudget(self.author_client.post(url, data))
+        for name in ("posts:profile_unfollow", "posts:profile_follow"):
+            with self.subTest(name=name):
+                url = reverse(name, args=(self.author.username,))
+                self.assertWithinBudget(self.authorized_client.get(url))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageBudgetTests(BudgetTestMixin, TestCase):
+    """Pages of posts with images written around the views."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        image = BytesIO()
+        Image.new("RGB", (100, 50), color=(255, 0, 0)).save(image, "png")
+        for number in range(settings.NUM_POSTS):
+            cls.post = Post.objects.create(
+                text=f"Пост {number}",
+                author=cls.author,
+                group=cls.group,
+                image=SimpleUploadedFile("image.png", image.getvalue()),
+            )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def urls(self):
+        return (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:post_detail", args=(self.post.id,)),
+        )
+
+    @override_settings(TASKS_MODE="worker")
+    def test_pages_do_not_queue_thumbnails(self):
+        """Posts without cards show a placeholder and queue nothing."""
+        for url in self.urls():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, "img/placeholder.svg")
+        self.assertFalse(Task.objects.exists())
+
+    def test_pages_with_cards_within_budget(self):
+        """The pages of the posts with generated cards stay in budget."""
+        generate(self.post.image.name)
+        for url in self.urls():
+            with self.subTest(url=url):
+                cache.clear()
+                response = self.client.get(url)
+                self.assertWithinBudget(response)
+                self.assertNotContains(response, "img/placeholder.svg")
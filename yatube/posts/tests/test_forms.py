@@ -86,12 +86,11 @@ class PostFormTests(TestCase):
             new_post.text: form_data["text"],
             new_post.group: self.group_2,
             new_post.author: self.user_1,
-            new_post.image: f"posts/{uploaded.name}",
         }
         for value, expected in value_expected.items():
             with self.subTest():
                 self.assertEqual(value, expected)
-        self.assertTrue(new_post.image)
+        self.assertRegex(new_post.image.name, r"^posts/\w{2}/\w{64}\.webp$")
 
     def test_create_post_reject_authorized_user(self):
         """Invalid form do not creates a post entry (authorized user)."""
@@ -0,0 +1,123 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import graph
+from posts.models import Follow, Post, Profile
+
+User = get_user_model()
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.other = User.objects.create_user(username="Other")
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow(self, author):
+        self.authorized_client.get(
+            reverse("posts:profile_follow", args=(author.username,))
+        )
+
+    def unfollow(self, author):
+        self.authorized_client.get(
+            reverse("posts:profile_unfollow", args=(author.username,))
+        )
+
+    def counts(self, user):
+        profile = Profile.objects.get(user=user)
+        return profile.followers_count, profile.following_count
+
+    def test_following_cached_until_follows_change(self):
+        """The followed authors are read once and dropped by follows."""
+        self.assertEqual(graph.following(self.user), frozenset())
+        with self.assertNumQueries(0):
+            graph.following(self.user)
+        self.follow(self.author)
+        self.assertTrue(graph.is_following(self.user, self.author))
+        self.assertEqual(graph.follower_count(self.author.pk), 1)
+        self.unfollow(self.author)
+        self.assertFalse(graph.is_following(self.user, self.author))
+        self.assertEqual(graph.follower_count(self.author.pk), 0)
+
+    def test_follow_counters(self):
+        """Follows change the counters shown on the profiles."""
+        self.follow(self.author)
+        self.assertEqual(self.counts(self.author), (1, 0))
+        self.assertEqual(self.counts(self.user), (0, 1))
+        response = self.client.get(
+            reverse("posts:profile", args=(self.author.username,))
+        )
+        self.assertContains(response, "Подписчиков: 1")
+        self.unfollow(self.author)
+        self.assertEqual(self.counts(self.author), (0, 0))
+        response = self.client.get(
+            reverse("posts:profile", args=(self.author.username,))
+        )
+        self.assertContains(response, "Подписчиков: 0")
+
+    def test_recount_fixes_follow_counters(self):
+        """Follows written in bulk are counted by the command."""
+        Follow.objects.bulk_create(
+            [
+                Follow(user=self.user, author=self.author),
+                Follow(user=self.other, author=self.author),
+            ]
+        )
+        call_command("recount_counters", stdout=StringIO())
+        self.assertEqual(self.counts(self.author), (2, 0))
+        self.assertEqual(self.counts(self.other), (0, 1))
+
+    def test_cards_marked_in_one_lookup(self):
+        """Feed cards show follow buttons from one cached lookup."""
+        Follow.objects.create(user=self.user, author=self.author)
+        posts = [
+            Post.objects.create(text="Пост", author=author)
+            for author in (self.author, self.other, self.user)
+        ]
+        graph.following(self.user)
+        with self.assertNumQueries(0):
+            graph.mark_followed(self.user, posts)
+        self.assertEqual(
+            [post.author_followed for post in posts], [True, False, None]
+        )
+        response = self.authorized_client.get(reverse("posts:index"))
+        self.assertContains(
+            response,
+            reverse("posts:profile_unfollow", args=(self.author.username,)),
+        )
+        self.assertContains(
+            response,
+            reverse("posts:profile_follow", args=(self.other.username,)),
+        )
+        self.assertNotContains(
+            response,
+            reverse("posts:profile_follow", args=(self.user.username,)),
+        )
+
+    @override_settings(REPLICA_LAG=5, FOLLOW_GRAPH_TIMEOUT=3600)
+    def test_replica_reads_cached_briefly(self):
+        """Follows read from a replica expire after the lag."""
+        with mock.patch.object(
+            graph.cache, "set_many", wraps=cache.set_many
+        ) as set_many:
+            graph.following(self.user)
+            self.assertEqual(set_many.call_args[0][1], 3600)
+            cache.clear()
+            with mock.patch("core.routers.replica_used", return_value=True):
+                graph.following(self.user)
+                graph.follower_counts([self.author.pk])
+        self.assertEqual(
+            [call[0][1] for call in set_many.call_args_list[1:]], [5, 5]
+        )
@@ -0,0 +1,114 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.forms import PostForm
+from posts.models import Post
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def upload(size=(1000, 500), name="image.jpg", image_format="jpeg", **info):
+    content = BytesIO()
+    Image.new("RGB", size, color=(0, 128, 255)).save(
+        content, image_format, **info
+    )
+    return SimpleUploadedFile(name, content.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ImageProcessingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Author")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, image):
+        self.authorized_client.post(
+            reverse("posts:post_create"), {"text": "Пост", "image": image}
+        )
+        return Post.objects.latest("id")
+
+    def test_image_encoded_without_metadata(self):
+        """The image is stored re-encoded and without its EXIF data."""
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        exif[0x010F] = "Camera"
+        post = self.create_post(upload(exif=exif.tobytes()))
+        self.assertTrue(post.image.name.endswith(".webp"))
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.format, settings.IMAGE_FORMAT)
+            self.assertEqual(image.size, (500, 1000))
+            self.assertFalse(image.getexif())
+            self.assertNotIn("exif", image.info)
+
+    @override_settings(IMAGE_MAX_WIDTH=400)
+    def test_wide_image_scaled_down(self):
+        """Images wider than the limit are scaled down."""
+        post = self.create_post(upload())
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (400, 200))
+
+    def test_cards_stored_and_listed_in_srcset(self):
+        """The cards of the image are stored and listed in srcset."""
+        post = self.create_post(upload())
+        widths = [w for w in settings.IMAGE_WIDTHS if w <= 1000]
+        cards = json.loads(post.image_variants)
+        self.assertEqual([card[0] for card in cards], widths)
+        for width, height, name in cards:
+            self.assertTrue(default_storage.exists(name))
+            with default_storage.open(name) as card:
+                self.assertEqual(Image.open(card).size, (width, height))
+        response = self.client.get(
+            reverse("posts:post_detail", args=(post.id,))
+        )
+        self.assertContains(response, f'srcset="{post.srcset}"')
+        self.assertContains(response, post.cards[-1]["url"])
+
+    def test_limits(self):
+        """Too large files and images are rejected."""
+        cases = (
+            ({"IMAGE_MAX_BYTES": 100}, "Файл больше"),
+            ({"IMAGE_MAX_PIXELS": 1000}, "Изображение больше"),
+        )
+        for limits, message in cases:
+            with self.subTest(limits=limits), override_settings(**limits):
+                form = PostForm(
+                    data={"text": "Пост"}, files={"image": upload()}
+                )
+                self.assertFalse(form.is_valid())
+                self.assertIn(message, form.errors["image"][0])
+
+    def test_cleared_image_drops_cards(self):
+        """A post without an image has no cards."""
+        post = self.create_post(upload())
+        form = PostForm(
+            data={"text": "Пост", "image-clear": "on"}, instance=post
+        )
+        self.assertTrue(form.is_valid())
+        form.save()
+        post.refresh_from_db()
+        self.assertFalse(post.image)
+        self.assertEqual(post.image_variants, "")
+        self.assertEqual(post.cards, [])
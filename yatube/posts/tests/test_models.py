@@ -1,8 +1,11 @@
+from io import StringIO
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Group, Post
+from posts.models import Comment, Group, Post
 
 User = get_user_model()
 
@@ -31,3 +34,65 @@ class PostModelTest(TestCase):
         for value, expected in value_expected.items():
             with self.subTest(expected_object_name=expected):
                 self.assertEqual(value, expected)
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="auth")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other-slug",
+            description="Тестовое описание",
+        )
+
+    def assertCounters(self, author_posts, group_posts, other_group_posts):
+        self.user.profile.refresh_from_db()
+        self.group.refresh_from_db()
+        self.other_group.refresh_from_db()
+        value_expected = {
+            "author": (self.user.profile.posts_count, author_posts),
+            "group": (self.group.posts_count, group_posts),
+            "other_group": (self.other_group.posts_count, other_group_posts),
+        }
+        for name, (value, expected) in value_expected.items():
+            with self.subTest(counter=name):
+                self.assertEqual(value, expected)
+
+    def test_post_counters_follow_writes(self):
+        """Post counters change on create, group change and delete."""
+        post = Post.objects.create(
+            author=self.user, text="Тестовый пост", group=self.group
+        )
+        self.assertCounters(1, 1, 0)
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(1, 0, 1)
+        post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_comment_counter_follows_writes(self):
+        """The comment counter changes on create and delete."""
+        post = Post.objects.create(author=self.user, text="Тестовый пост")
+        comment = Comment.objects.create(
+            post=post, author=self.user, text="Комментарий"
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        comment.delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+
+    def test_recount_counters_fixes_drift(self):
+        """The command recounts the counters skipped by bulk writes."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text="Тестовый пост", group=self.group)
+            for _ in range(3)
+        )
+        call_command("recount_counters", stdout=StringIO())
+        self.assertCounters(3, 3, 0)
@@ -0,0 +1,94 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN of SQLite")
+class QueryPlanTests(TestCase):
+    """The feed queries are answered from the indexes.
+
+    A plan that sorts rows in a temporary b-tree or scans a table
+    without an index fails the test, so a change of the queries or the
+    indexes that makes a page read all rows is caught early.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Reader")
+        cls.author = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for number in range(settings.NUM_POSTS + 1):
+            cls.post = Post.objects.create(
+                text=f"Пост {number}", author=cls.author, group=cls.group
+            )
+        for number in range(settings.NUM_COMMENTS + 1):
+            Comment.objects.create(
+                text=f"Комментарий {number}", author=cls.user, post=cls.post
+            )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(QueryPlanTests.user)
+
+    def plans(self, url):
+        """Return the plan of every query run by the page."""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        plans = []
+        for query in queries.captured_queries:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {query['sql']}")
+                plans.append((query["sql"], [row[-1] for row in cursor]))
+        return plans
+
+    def assertIndexed(self, url):
+        for sql, plan in self.plans(url):
+            with self.subTest(url=url, sql=sql):
+                for step in plan:
+                    self.assertNotIn("USE TEMP B-TREE", step)
+                    if step.startswith("SCAN"):
+                        self.assertIn("USING", step)
+
+    def next_page(self, url, page="page_obj"):
+        """Return the url of the second page of the feed."""
+        cache.clear()
+        response = self.authorized_client.get(url)
+        cursor = response.context[page].paginator.next_cursor
+        self.assertIsNotNone(cursor)
+        return f"{url}?cursor={cursor}"
+
+    def test_feeds_use_indexes(self):
+        """The feed pages and their next pages are read by index."""
+        urls = (
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.author.username,)),
+            reverse("posts:follow_index"),
+        )
+        for url in urls:
+            self.assertIndexed(url)
+            self.assertIndexed(self.next_page(url))
+
+    def test_post_page_uses_indexes(self):
+        """The post page and the pages of its comments are read by index."""
+        self.assertIndexed(reverse("posts:post_detail", args=(self.post.id,)))
+        url = reverse("posts:post_comments", args=(self.post.id,))
+        self.assertIndexed(url)
+        self.assertIndexed(self.next_page(url, "comments"))
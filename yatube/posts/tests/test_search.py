@@ -0,0 +1,83 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+@skipUnless(connection.vendor == "sqlite", "FTS5 index of SQLite")
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="Author")
+        cls.admin = User.objects.create_superuser(
+            username="Admin", email="admin@example.com", password="password"
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(
+            reverse("posts:search"), {"q": query, **params}
+        )
+        return list(response.context["page_obj"])
+
+    def test_index_follows_saves_and_deletes(self):
+        """Created, edited and deleted posts are found accordingly."""
+        post = Post.objects.create(text="Первый снег", author=self.author)
+        self.assertEqual(self.search("снег"), [post])
+        post.text = "Весенний дождь"
+        post.save()
+        self.assertEqual(self.search("снег"), [])
+        self.assertEqual(self.search("дожд"), [post])
+        post.delete()
+        self.assertEqual(self.search("дождь"), [])
+
+    def test_results_ranked_and_highlighted(self):
+        """More relevant posts come first, the words are highlighted."""
+        Post.objects.create(
+            text="Кот спит на солнце, а собака лает", author=self.author
+        )
+        best = Post.objects.create(
+            text="Кот <b>и</b> кот: кот ловит кота", author=self.author
+        )
+        results = self.search("кот")
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0], best)
+        self.assertIn("<mark>Кот</mark>", results[0].snippet)
+        self.assertIn("&lt;b&gt;", results[0].snippet)
+
+    def test_query_syntax_not_interpreted(self):
+        """Quotes and operators of the query do not break the search."""
+        post = Post.objects.create(text="Проверка запроса", author=self.author)
+        self.assertEqual(self.search('"проверка" (запрос*'), [post])
+        self.assertEqual(self.search('"*'), [])
+
+    def test_results_paginated(self):
+        """The results are split into pages."""
+        for number in range(12):
+            Post.objects.create(
+                text=f"Пост номер {number}", author=self.author
+            )
+        self.assertEqual(len(self.search("пост")), 5)
+        self.assertEqual(len(self.search("пост", page=3)), 2)
+
+    def test_admin_search_and_rebuild(self):
+        """The admin finds posts by the index rebuilt by the command."""
+        post = Post.objects.create(text="Редкое слово", author=self.author)
+        Post.objects.bulk_create(
+            [Post(text="Пропущенное слово", author=self.author)]
+        )
+        call_command("rebuild_search_index", stdout=StringIO())
+        admin_client = Client()
+        admin_client.force_login(SearchTests.admin)
+        response = admin_client.get(
+            reverse("admin:posts_post_changelist"), {"q": "редкое"}
+        )
+        self.assertEqual(list(response.context["cl"].result_list), [post])
+        self.assertEqual(len(self.search("слово")), 2)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+
+from posts.models import Post
+from posts.thumbnails import GEOMETRY, OPTIONS, generate, source
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+def upload(color=(255, 0, 0), name="image.png"):
+    content = BytesIO()
+    Image.new("RGB", (100, 50), color=color).save(content, "png")
+    return SimpleUploadedFile(name, content.getvalue())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Author")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def create_post(self, image):
+        return Post.objects.create(text="Пост", author=self.user, image=image)
+
+    def collect(self, *args):
+        out = StringIO()
+        call_command("collect_media", *args, stdout=out)
+        return out.getvalue()
+
+    def test_same_content_stored_once(self):
+        """Reposted pictures share the file, other ones do not."""
+        first = self.create_post(upload(name="first.png"))
+        second = self.create_post(upload(name="second.png"))
+        other = self.create_post(upload(color=(0, 0, 255)))
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertNotEqual(first.image.name, other.image.name)
+        self.assertRegex(first.image.name, r"^posts/\w{2}/\w{64}\.png$")
+        directory = os.path.dirname(first.image.path)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_same_image_saved_again_keeps_cards(self):
+        """Uploading the stored picture again keeps the cards of the post."""
+        post = self.create_post(upload())
+        generate(post.image.name)
+        post = Post.objects.get(pk=post.pk)
+        cards = post.image_variants
+        post.image = upload(name="again.png")
+        post.save()
+        self.assertEqual(post.image_variants, cards)
+        post.image = upload(color=(0, 0, 255))
+        post.save()
+        self.assertEqual(post.image_variants, "")
+
+    def test_repost_uses_thumbnail(self):
+        """The thumbnail of a picture is made once for all its posts."""
+        first = self.create_post(upload())
+        generate(first.image.name)
+        second = self.create_post(upload())
+        thumbnail = default.backend.get_thumbnail(
+            second.image, GEOMETRY, **OPTIONS
+        )
+        self.assertFalse(getattr(thumbnail, "is_placeholder", False))
+
+    def test_orphans_collected(self):
+        """Files of deleted and edited posts are deleted when unused."""
+        shared = self.create_post(upload())
+        self.create_post(upload())
+        edited = self.create_post(upload(color=(0, 255, 0)))
+        generate(edited.image.name)
+        old_name = edited.image.name
+        edited.image = upload(color=(0, 0, 255))
+        edited.save()
+        shared.delete()
+        self.assertIn("Deleted 0 orphaned", self.collect())
+        self.assertIn(
+            "Found 1 orphaned", self.collect("--grace=0", "--dry-run")
+        )
+        self.assertIn("Deleted 1 orphaned", self.collect("--grace=0"))
+        storage = Post.image.field.storage
+        self.assertFalse(storage.exists(old_name))
+        self.assertFalse(default.kvstore.get(source(old_name)))
+        for post in Post.objects.all():
+            self.assertTrue(storage.exists(post.image.name))
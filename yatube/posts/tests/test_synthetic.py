@@ -0,0 +1,117 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.db.models.expressions import RawSQL
+from django.test import TestCase, override_settings
+
+from posts import search, synthetic
+from posts.models import Comment, Follow, Group, Post, Profile, TimelineEntry
+
+
+class SyntheticDataTests(TestCase):
+    def generate(self, **options):
+        options = {
+            "users": 40,
+            "groups": 4,
+            "posts": 200,
+            "comments": 100,
+            "follows": 5,
+            "workers": 0,
+            "stdout": StringIO(),
+            **options,
+        }
+        call_command("generate_data", **options)
+
+    def test_rows_generated(self):
+        """All rows are created, with counters and timelines."""
+        self.generate()
+        self.assertEqual(Profile.objects.count(), 40)
+        self.assertEqual(Group.objects.count(), 4)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        self.assertTrue(TimelineEntry.objects.exists())
+        group = Group.objects.annotate(total=Count("posts")).first()
+        self.assertEqual(group.posts_count, group.total)
+        self.assertEqual(
+            Post.objects.filter(author__username="synthetic0").count(),
+            Profile.objects.get(user__username="synthetic0").posts_count,
+        )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=5)
+    def test_pulled_authors_not_pushed(self):
+        """Inboxes get no posts of the authors with many followers."""
+        self.generate()
+        pulled = Profile.objects.filter(followers_count__gt=5)
+        self.assertTrue(pulled.exists())
+        self.assertFalse(
+            TimelineEntry.objects.filter(
+                post__author__profile__in=pulled
+            ).exists()
+        )
+        self.assertTrue(TimelineEntry.objects.exists())
+
+    @skipUnless(connection.vendor == "sqlite", "FTS5 index of SQLite")
+    def test_posts_indexed(self):
+        """The generated posts are found by the search."""
+        self.generate()
+        post = Post.objects.order_by("id").first()
+        word = post.text.split()[0]
+        found = Post.objects.filter(id__in=RawSQL(*search.matching_ids(word)))
+        self.assertIn(post, found)
+
+    def test_followers_skewed(self):
+        """The first authors get the most followers."""
+        self.generate()
+        followers = dict(
+            Follow.objects.values_list("author__username")
+            .annotate(total=Count("id"))
+            .values_list("author__username", "total")
+        )
+        self.assertGreater(
+            followers.get("synthetic0", 0), followers.get("synthetic39", 0)
+        )
+
+    def test_same_seed_same_rows(self):
+        """The rows depend on the seed only."""
+        self.generate(seed=7)
+        first = list(
+            Post.objects.order_by("id").values_list("text", "pub_date")
+        )
+        Post.objects.all().delete()
+        self.generate(seed=7, prefix="again")
+        second = list(
+            Post.objects.order_by("id").values_list("text", "pub_date")
+        )
+        self.assertEqual(first, second)
+        plan = synthetic.Plan(
+            seed=8,
+            prefix="other",
+            users=40,
+            groups=4,
+            posts=200,
+            comments=100,
+            follows=5,
+            alpha=1.0,
+            images=0,
+            image_names=[],
+            start=None,
+            step=0,
+            user_base=1,
+            group_base=1,
+            post_base=1,
+        )
+        follows = [
+            (follow.user_id, follow.author_id)
+            for follow in synthetic.build(plan, "follows", 0, 40)
+        ]
+        self.assertEqual(
+            follows,
+            [
+                (follow.user_id, follow.author_id)
+                for follow in synthetic.build(plan, "follows", 0, 40)
+            ],
+        )
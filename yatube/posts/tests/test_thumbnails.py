@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+from io import BytesIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings, TestCase
+from django.urls import reverse
+from PIL import Image
+
+from posts.management.commands.generate_thumbnails import regenerate
+from posts.models import Post
+from posts.thumbnails import BackgroundThumbnailBackend, generate
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+User = get_user_model()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Author")
+        image = BytesIO()
+        Image.new("RGB", (100, 50), color=(255, 0, 0)).save(image, "png")
+        cls.post = Post.objects.create(
+            text="Тестовый пост",
+            author=cls.user,
+            image=SimpleUploadedFile("image.png", image.getvalue()),
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_placeholder_until_thumbnail_generated(self):
+        """Pages show a placeholder until the thumbnail is generated."""
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "img/placeholder.svg")
+        version = self.post.updated
+        generate(self.post.image.name)
+        self.post.refresh_from_db()
+        self.assertNotEqual(self.post.updated, version)
+        response = self.client.get(reverse("posts:index"))
+        self.assertNotContains(response, "img/placeholder.svg")
+        self.assertContains(response, settings.MEDIA_URL + "cache/")
+
+    def test_generated_thumbnail_stored_as_card(self):
+        """Pages render a generated thumbnail without the key-value store."""
+        generate(self.post.image.name)
+        self.post.refresh_from_db()
+        card = self.post.cards[0]
+        self.assertEqual((card["width"], card["height"]), (960, 339))
+        with mock.patch.object(
+            BackgroundThumbnailBackend,
+            "get_thumbnail",
+            side_effect=AssertionError("Key-value store lookup"),
+        ):
+            response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, card["url"])
+
+    def test_card_of_replaced_image_dropped(self):
+        """A new image saved around the form gets a new thumbnail."""
+        generate(self.post.image.name)
+        post = Post.objects.get(pk=self.post.pk)
+        image = BytesIO()
+        Image.new("RGB", (50, 50), color=(0, 255, 0)).save(image, "png")
+        post.image = SimpleUploadedFile("new.png", image.getvalue())
+        post.save()
+        self.assertEqual(post.image_variants, "")
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(response, "img/placeholder.svg")
+
+    def test_forced_thumbnail_replaces_card(self):
+        """Recreated thumbnails become the cards of their posts."""
+        generate(self.post.image.name)
+        Post.objects.filter(pk=self.post.pk).update(
+            image_variants='[[960, 339, "cache/00/00/old.jpg"]]'
+        )
+        regenerate(self.post.image.name, force=True)
+        self.post.refresh_from_db()
+        card = self.post.cards[0]
+        self.assertNotIn("old.jpg", card["url"])
+        self.assertEqual((card["width"], card["height"]), (960, 339))
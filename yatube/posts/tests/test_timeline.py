@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Follower")
+        cls.author = User.objects.create_user(username="Author")
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(TimelineTests.user)
+
+    def test_new_post_pushed_to_followers(self):
+        """A new post is pushed into the inbox of every follower."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+
+    def test_follow_backfills_and_unfollow_prunes_inbox(self):
+        """Following fills the inbox, unfollowing clears it."""
+        post = Post.objects.create(text="Старый пост", author=self.author)
+        self.authorized_client.get(
+            reverse("posts:profile_follow", args=(self.author.username,))
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
+        self.authorized_client.get(
+            reverse("posts:profile_unfollow", args=(self.author.username,))
+        )
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_posts_of_popular_author_pulled(self):
+        """Posts of popular authors are not pushed but still in the feed."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        response = self.authorized_client.get(reverse("posts:follow_index"))
+        self.assertEqual(list(response.context["page_obj"]), [post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_posts_of_author_pushed_again_kept(self):
+        """Posts pulled while the author was popular stay in the feed."""
+        other = User.objects.create_user(username="Other")
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        post = Post.objects.create(text="Новый пост", author=self.author)
+        self.assertFalse(TimelineEntry.objects.exists())
+        Follow.objects.filter(user=other).delete()
+        response = self.authorized_client.get(reverse("posts:follow_index"))
+        self.assertEqual(list(response.context["page_obj"]), [post])
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.user, post=post).exists()
+        )
@@ -1,16 +1,24 @@
+import json
 import shutil
 import tempfile
+import time
 from contextlib import suppress
 from http import HTTPStatus
 from random import randint
+from unittest import mock
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, override_settings, TestCase
+from django.test import Client, override_settings, RequestFactory, TestCase
 from django.urls import reverse
+from django.utils.http import urlsafe_base64_encode
 
+from posts import cache as feed_cache
+from posts.counters import reconcile
 from posts.forms import PostForm
 from posts.models import Comment, Follow, Group, Post
 
@@ -201,6 +209,7 @@ class TaskPagesTests(TestCase):
                 )
             )
         Post.objects.bulk_create(post_list)
+        reconcile()
         addresses = [
             reverse("posts:index"),
             reverse("posts:group_list", args=(self.group.slug,)),
@@ -220,6 +229,71 @@ class TaskPagesTests(TestCase):
                         len(response.context["page_obj"]), post_count
                     )
 
+    def test_cursor_paginator(self):
+        """The cursor pages walk the feed forwards and backwards."""
+        Post.objects.bulk_create(
+            Post(text=f"Тестовый пост{i}", author=self.user, group=self.group)
+            for i in range(settings.NUM_POSTS * 2)
+        )
+        expected = list(
+            Post.objects.filter(group=self.group).order_by("-pub_date", "-id")
+        )
+        addresses = [
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.user.username,)),
+        ]
+        for address in addresses:
+            with self.subTest(address=address):
+                pages = []
+                response = self.client.get(address)
+                paginator = response.context["page_obj"].paginator
+                self.assertIsNone(paginator.previous_cursor)
+                pages.append(list(response.context["page_obj"]))
+                while paginator.next_cursor:
+                    response = self.client.get(
+                        address, {"cursor": paginator.next_cursor}
+                    )
+                    paginator = response.context["page_obj"].paginator
+                    pages.append(list(response.context["page_obj"]))
+                self.assertEqual(sum(pages, []), expected)
+                response = self.client.get(
+                    address, {"cursor": paginator.previous_cursor}
+                )
+                self.assertEqual(list(response.context["page_obj"]), pages[-2])
+
+    def test_cursor_paginator_invalid_cursor(self):
+        """A malformed cursor falls back to the first page."""
+        response = self.client.get(
+            reverse("posts:index"), {"cursor": "not-a-cursor"}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.context["page_obj"][0], self.post)
+
+    def test_cursor_paginator_tampered_cursor(self):
+        """Key values of the wrong type fall back to the first page."""
+        cursors = [
+            urlsafe_base64_encode(json.dumps(payload).encode())
+            for payload in (
+                ["n", ["garbage", 1]],
+                ["n", ["2022-01-01T00:00:00+00:00", "garbage"]],
+                ["p", [None, 1]],
+                ["n", [[], {}]],
+            )
+        ]
+        addresses = (
+            reverse("posts:index"),
+            reverse("posts:follow_index"),
+            reverse("api:posts"),
+        )
+        for address in addresses:
+            for cursor in cursors:
+                with self.subTest(address=address, cursor=cursor):
+                    response = self.authorized_client.get(
+                        address, {"cursor": cursor}
+                    )
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
     def test_new_comment_created_correctly(self):
         """The new comment is displayed on the post page."""
         new_comment_count = Comment.objects.count() + 1
@@ -245,6 +319,28 @@ class TaskPagesTests(TestCase):
             with self.subTest():
                 self.assertEqual(current, expected)
 
+    @override_settings(NUM_COMMENTS=2)
+    def test_comments_paginated(self):
+        """Comments are shown by pages, the next ones by the fragment."""
+        comments = [
+            Comment.objects.create(
+                text=f"Комментарий {i}", post=self.post, author=self.user
+            )
+            for i in range(3)
+        ]
+        response = self.client.get(
+            reverse("posts:post_detail", args=(self.post.id,))
+        )
+        self.assertEqual(list(response.context["comments"]), comments[:2])
+        cursor = response.context["comments"].paginator.next_cursor
+        response = self.client.get(
+            reverse("posts:post_comments", args=(self.post.id,)),
+            {"cursor": cursor},
+        )
+        self.assertTemplateUsed(response, "posts/includes/comments.html")
+        self.assertEqual(list(response.context["comments"]), comments[2:])
+        self.assertIsNone(response.context["comments"].paginator.next_cursor)
+
     def test_authorized_user_follow(self):
         """Authorized user can follow other user."""
         user_following = User.objects.create_user(username="Following")
@@ -334,16 +430,33 @@ class TaskPagesTests(TestCase):
 
 
 class CacheTests(TestCase):
-    def test_cache_index_page(self):
-        """Checking the caching of the main page."""
-        user = User.objects.create_user(username="Author")
-        post = Post.objects.create(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
             text="Тестовый пост",
-            author=user,
+            author=self.user,
+            group=self.group,
         )
+        self.addresses = [
+            reverse("posts:index"),
+            reverse("posts:group_list", args=(self.group.slug,)),
+            reverse("posts:profile", args=(self.user.username,)),
+        ]
+
+    def test_cache_index_page(self):
+        """Checking the caching of the main page."""
         response = self.client.get(reverse("posts:index"))
         index_content = response.content
-        post.delete()
+        Post.objects.filter(pk=self.post.pk).update(text="Изменённый пост")
         response = self.client.get(reverse("posts:index"))
         index_content_cache = response.content
         cache.clear()
@@ -354,3 +467,267 @@ class CacheTests(TestCase):
             index_content,
             index_content_no_cache,
         )
+
+    def test_cache_invalidated_on_post_delete(self):
+        """Deleting a post invalidates the cached feed pages."""
+        for address in self.addresses:
+            self.client.get(address)
+        self.post.delete()
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertNotContains(response, "Тестовый пост")
+
+    def test_cache_invalidated_on_post_edit(self):
+        """Editing a post invalidates the cached feed pages."""
+        for address in self.addresses:
+            self.client.get(address)
+        self.post.text = "Изменённый пост"
+        self.post.save()
+        for address in self.addresses:
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertContains(response, "Изменённый пост")
+
+    def test_cache_kept_for_unrelated_group(self):
+        """A post of another group keeps the cached group page."""
+        address = reverse("posts:group_list", args=(self.group.slug,))
+        self.client.get(address)
+        other_group = Group.objects.create(
+            title="Другая группа",
+            slug="other-slug",
+            description="Тестовое описание",
+        )
+        Post.objects.create(
+            text="Пост другой группы", author=self.user, group=other_group
+        )
+        response = self.client.get(address)
+        self.assertIsNone(response.context)
+
+    def test_group_edit_invalidates_feeds(self):
+        """A renamed group is linked under the new slug on the feeds."""
+        old_address = reverse("posts:group_list", args=(self.group.slug,))
+        new_address = reverse("posts:group_list", args=("new-slug",))
+        addresses = [
+            reverse("posts:index"),
+            reverse("posts:profile", args=(self.user.username,)),
+        ]
+        etags = {
+            address: self.client.get(address)["ETag"] for address in addresses
+        }
+        self.client.get(old_address)
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = "new-slug"
+        group.save()
+        for address, etag in etags.items():
+            with self.subTest(address=address):
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, new_address)
+                self.assertNotContains(response, old_address)
+        response = self.client.get(old_address)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_author_edit_invalidates_group_pages(self):
+        """The new name of the author is shown on the pages of groups."""
+        address = reverse("posts:group_list", args=(self.group.slug,))
+        etag = self.client.get(address)["ETag"]
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Новое имя"
+        user.save()
+        response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, "Новое имя")
+
+    def test_stale_page_served_while_recomputed(self):
+        """A request gets the stale page while another one recomputes it."""
+        address = reverse("posts:index")
+        self.client.get(address)
+        Post.objects.create(text="Новый пост", author=self.user)
+        request = RequestFactory().get(address)
+        request.user = AnonymousUser()
+        page = feed_cache.page_key(request, "index")
+        generations = feed_cache.get_generations([feed_cache.POSTS])
+        cache.add(f"lock:{page}:{generations[0]}", 1)
+        stale = feed_cache.stats["stale"]
+        response = self.client.get(address)
+        self.assertNotContains(response, "Новый пост")
+        self.assertEqual(feed_cache.stats["stale"], stale + 1)
+
+    @override_settings(FEED_CACHE_LOCK_TIMEOUT=0)
+    def test_lock_released_by_its_holder_only(self):
+        """A request that gave up waiting keeps the lock of another one."""
+        address = reverse("posts:index")
+        request = RequestFactory().get(address)
+        request.user = AnonymousUser()
+        page = feed_cache.page_key(request, "index")
+        generations = feed_cache.get_generations([feed_cache.POSTS])
+        lock = f"lock:{page}:{generations[0]}"
+        cache.set(lock, "holder")
+        response = self.client.get(address)
+        self.assertContains(response, "Тестовый пост")
+        self.assertEqual(cache.get(lock), "holder")
+        cache.delete(lock)
+        cache.delete_many([page, f"{page}:{generations[0]}"])
+        self.client.get(address)
+        self.assertIsNone(cache.get(lock))
+
+    def test_early_refresh_draws_any_number(self):
+        """The random draw of the early refresh may be zero."""
+        entry = feed_cache.Entry(None, time.time() + 60, 0.1)
+        with mock.patch("posts.cache.random.random", return_value=0.0):
+            self.assertFalse(feed_cache._refresh_early(entry))
+
+    @override_settings(FEED_CACHE_REFRESH=0)
+    def test_expired_page_recomputed_early(self):
+        """A page past its soft expiry is recomputed."""
+        address = reverse("posts:index")
+        self.client.get(address)
+        recomputes = feed_cache.stats["recomputes"]
+        response = self.client.get(address)
+        self.assertIsNotNone(response.context)
+        self.assertEqual(feed_cache.stats["recomputes"], recomputes + 1)
+
+    def test_post_edit_invalidates_only_its_card(self):
+        """Editing a post changes the key of its cached card only."""
+        other_post = Post.objects.create(text="Другой пост", author=self.user)
+        self.client.get(reverse("posts:index"))
+        client = Client()
+        client.force_login(self.user)
+        client.post(
+            reverse("posts:post_edit", args=(self.post.id,)),
+            data={"text": "Изменённый пост"},
+        )
+        self.post.refresh_from_db()
+        cards = {
+            self.post: False,
+            other_post: True,
+        }
+        for post, cached in cards.items():
+            with self.subTest(post=post):
+                key = make_template_fragment_key(
+                    "post_card",
+                    [
+                        post.id,
+                        post.updated,
+                        post.author.get_full_name(),
+                        post.author.username,
+                        post.group.slug if post.group else "",
+                    ],
+                )
+                self.assertEqual(cache.get(key) is not None, cached)
+
+    def test_renamed_author_gets_new_cards(self):
+        """Cached cards link to the profile under the new username."""
+        User.objects.filter(pk=self.user.pk).update(first_name="Имя")
+        self.client.get(reverse("posts:index"))
+        user = User.objects.get(pk=self.user.pk)
+        user.username = "Renamed"
+        user.save()
+        response = self.client.get(reverse("posts:index"))
+        self.assertContains(
+            response, reverse("posts:profile", args=("Renamed",))
+        )
+        self.assertNotContains(
+            response, reverse("posts:profile", args=("Author",))
+        )
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="Author")
+        cls.group = Group.objects.create(
+            title="Тестовая группа",
+            slug="test-slug",
+            description="Тестовое описание",
+        )
+        cls.post = Post.objects.create(
+            text="Тестовый пост", author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.queries = {
+            reverse("posts:index"): 0,
+            reverse("posts:group_list", args=(self.group.slug,)): 0,
+            reverse("posts:profile", args=(self.user.username,)): 0,
+            reverse("posts:post_detail", args=(self.post.id,)): 1,
+        }
+
+    def test_unchanged_page_not_modified(self):
+        """A client holding the current page gets 304 without rendering."""
+        for address, queries in self.queries.items():
+            with self.subTest(address=address):
+                response = self.client.get(address)
+                self.assertIn("no-cache", response["Cache-Control"])
+                with self.assertNumQueries(queries):
+                    response = self.client.get(
+                        address, HTTP_IF_NONE_MATCH=response["ETag"]
+                    )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+                self.assertIsNone(response.context)
+                response = self.client.get(
+                    address, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_changed_page_modified(self):
+        """A new post or comment changes the validators of the pages."""
+        etags = {
+            address: self.client.get(address)["ETag"]
+            for address in self.queries
+        }
+        Post.objects.create(
+            text="Новый пост", author=self.user, group=self.group
+        )
+        Comment.objects.create(text="Новый", author=self.user, post=self.post)
+        for address, etag in etags.items():
+            with self.subTest(address=address):
+                response = self.client.get(address, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_pages_of_users_validated_separately(self):
+        """The copy of another user is not valid, pages are private."""
+        for address in self.queries:
+            with self.subTest(address=address):
+                etag = self.client.get(address)["ETag"]
+                response = self.authorized_client.get(
+                    address, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn("private", response["Cache-Control"])
+                response = self.authorized_client.get(
+                    address, HTTP_IF_NONE_MATCH=response["ETag"]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_page_with_form_validated_by_csrf_token(self):
+        """A copy with the CSRF token before the login is outdated."""
+        address = reverse("posts:post_detail", args=(self.post.id,))
+        etag = self.authorized_client.get(address)["ETag"]
+        response = self.authorized_client.get(
+            address, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        # The login rotates the token
+        self.authorized_client.cookies[settings.CSRF_COOKIE_NAME] = "a" * 64
+        response = self.authorized_client.get(
+            address, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_stale_page_keeps_its_validators(self):
+        """A stale page is sent with the validators of its version."""
+        address = reverse("posts:index")
+        etag = self.client.get(address)["ETag"]
+        Post.objects.create(text="Новый пост", author=self.user)
+        request = RequestFactory().get(address)
+        request.user = AnonymousUser()
+        page = feed_cache.page_key(request, "index")
+        generations = feed_cache.get_generations([feed_cache.POSTS])
+        cache.add(f"lock:{page}:{generations[0]}", 1)
+        response = self.client.get(address)
+        self.assertNotContains(response, "Новый пост")
+        self.assertEqual(response["ETag"], etag)
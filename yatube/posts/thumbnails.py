@@ -0,0 +1,148 @@
+"""Thumbnails of the post images generated in the background.
+
+The ``{% thumbnail %}`` tag does not resize images while rendering a
+page: a missing thumbnail gets a placeholder. The thumbnails are queued
+by the writes of the posts, the images of the posts written around the
+views are filled by ``generate_thumbnails``. When the thumbnail is ready
+it is stored as the card of the posts showing the image, and they get a
+new version: their pages are rendered again from the card without
+asking the key-value store.
+"""
+
+import json
+
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as sorl_defaults
+from sorl.thumbnail.conf import settings as sorl_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.parsers import parse_geometry
+
+from core.tasks import enqueue, task
+from posts.cache import bump, post_scopes
+from posts.models import Post
+
+GEOMETRY = "960x339"
+OPTIONS = {"crop": "center", "upscale": True}
+
+
+class Placeholder:
+    """Image shown until the thumbnail is generated."""
+
+    is_placeholder = True
+
+    def __init__(self, geometry_string):
+        self.width, self.height = parse_geometry(geometry_string)
+        self.url = static("img/placeholder.svg")
+
+
+class BackgroundThumbnailBackend(ThumbnailBackend):
+    """Backend that returns only thumbnails found in the key-value store.
+
+    With ``THUMBNAIL_ASYNC`` turned off it generates the thumbnails
+    while rendering like the default backend.
+    """
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not settings.THUMBNAIL_ASYNC or not file_:
+            return super().get_thumbnail(file_, geometry_string, **options)
+        source = ImageFile(file_)
+        thumbnail = ImageFile(
+            self._get_thumbnail_filename(
+                source, geometry_string, self.full_options(source, options)
+            ),
+            default.storage,
+        )
+        # Pages only read: queueing the thumbnail here would write to the
+        # database on every render of a post without cards
+        return default.kvstore.get(thumbnail) or Placeholder(geometry_string)
+
+    def generate(self, name, geometry_string, options):
+        """Create the thumbnail of the image as the default backend does."""
+        return super().get_thumbnail(name, geometry_string, **options)
+
+    def full_options(self, source, options):
+        """Add the defaults to the options like ``get_thumbnail`` does."""
+        options = dict(options)
+        if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault("format", self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(sorl_settings, attr)
+            if value != getattr(sorl_defaults, attr):
+                options.setdefault(key, value)
+        return options
+
+
+def source(name):
+    """Post image as the templates pass it, so the thumbnail keys match."""
+    return ImageFile(name, Post.image.field.storage)
+
+
+def missing():
+    """Names of the images of the posts without cards."""
+    return (
+        Post.objects.exclude(image="")
+        .filter(image_variants="")
+        .order_by()
+        .values_list("image", flat=True)
+        .distinct()
+    )
+
+
+def drop_cards(name):
+    """Drop the cards of the image posts made of its generated thumbnail.
+
+    The cards cut at upload are kept, ``generate`` fills the dropped ones
+    with the new thumbnail.
+    """
+    prefix = sorl_settings.THUMBNAIL_PREFIX
+    posts = (
+        Post.objects.filter(image=name)
+        .exclude(image_variants="")
+        .values_list("pk", "image_variants")
+    )
+    dropped = [
+        pk
+        for pk, variants in posts
+        if all(card[2].startswith(prefix) for card in json.loads(variants))
+    ]
+    Post.objects.filter(pk__in=dropped).update(image_variants="")
+
+
+def schedule(name, geometry_string=GEOMETRY, options=OPTIONS):
+    """Queue the thumbnail, unless it is already queued."""
+    enqueue(generate, name, geometry_string, options, unique=True)
+
+
+def schedule_post(post):
+    """Queue the thumbnail of a post image without cards."""
+    if post.image and not post.image_variants:
+        schedule(post.image.name)
+
+
+@task
+def generate(name, geometry_string=GEOMETRY, options=OPTIONS):
+    """Create the thumbnail and renew the versions of its posts.
+
+    The thumbnail of the card geometry becomes the card of the posts
+    which have none.
+    """
+    thumbnail = BackgroundThumbnailBackend().generate(
+        source(name), geometry_string, options
+    )
+    posts = Post.objects.filter(image=name)
+    if (geometry_string, options) == (GEOMETRY, OPTIONS):
+        card = [thumbnail.width, thumbnail.height, thumbnail.name]
+        posts.filter(image_variants="").update(
+            image_variants=json.dumps([card])
+        )
+    posts.update(updated=timezone.now())
+    scopes = set()
+    for post in posts.select_related("author", "group"):
+        scopes.update(post_scopes(post))
+    bump(*scopes)
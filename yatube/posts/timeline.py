@@ -0,0 +1,122 @@
+"""Home timeline of the followers (fan-out on write).
+
+A new post is pushed into the inbox of every follower of its author, so
+the follow feed is read from the inbox of a single user. Posts of the
+authors with more followers than ``settings.TIMELINE_FANOUT_LIMIT`` are
+not pushed: the feed pulls them at read time instead, and the inboxes
+get the latest posts of an author who drops back to the limit. Writes
+to an inbox bump the follower scope of its user, since the feed
+validated before them is stale.
+"""
+
+from django.conf import settings
+from django.db.models import F, Q
+
+from posts import cache, graph
+from posts.models import Follow, Post, TimelineEntry
+
+
+def is_pulled(author_id):
+    """Whether posts of the author are pulled instead of pushed."""
+    return graph.follower_count(author_id) > settings.TIMELINE_FANOUT_LIMIT
+
+
+def pulled_authors(user):
+    """Return ids of the followed authors whose posts are pulled."""
+    counts = graph.follower_counts(graph.following(user))
+    return [
+        author_id
+        for author_id, followers in counts.items()
+        if followers > settings.TIMELINE_FANOUT_LIMIT
+    ]
+
+
+def fan_out(post):
+    """Push the post into the inboxes of the followers of its author."""
+    if is_pulled(post.author_id):
+        return
+    followers = list(
+        Follow.objects.filter(author=post.author).values_list(
+            "user", flat=True
+        )
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in followers
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    cache.bump(
+        *(cache.FOLLOWER.format(user_id=user_id) for user_id in followers)
+    )
+
+
+def backfill(user, author):
+    """Fill the inbox of the new follower with the latest author posts."""
+    if is_pulled(author.pk):
+        return
+    posts = Post.objects.filter(author=author).values_list("id", "pub_date")
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user=user, post_id=post_id, pub_date=pub_date)
+            for post_id, pub_date in posts[: settings.TIMELINE_BACKFILL_LIMIT]
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    cache.bump(cache.FOLLOWER.format(user_id=user.pk))
+
+
+def repush(author):
+    """Fill the inboxes of the followers of an author pushed again.
+
+    The posts written while the author was pulled are in no inbox.
+    """
+    if is_pulled(author.pk):
+        return
+    followers = list(
+        Follow.objects.filter(author=author).values_list("user", flat=True)
+    )
+    posts = list(
+        Post.objects.filter(author=author).values_list("id", "pub_date")[
+            : settings.TIMELINE_BACKFILL_LIMIT
+        ]
+    )
+    TimelineEntry.objects.bulk_create(
+        (
+            TimelineEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+            for user_id in followers
+            for post_id, pub_date in posts
+        ),
+        batch_size=settings.TIMELINE_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    cache.bump(
+        *(cache.FOLLOWER.format(user_id=user_id) for user_id in followers)
+    )
+
+
+def prune(user, author):
+    """Remove the posts of the unfollowed author from the inbox."""
+    TimelineEntry.objects.filter(user=user, post__author=author).delete()
+
+
+def home_timeline(user):
+    """Return the posts of the authors the user is subscribed to.
+
+    The posts are annotated with ``feed_date`` and ``feed_post`` to be
+    ordered by ``TIMELINE_ORDERING``: a feed read from the inbox alone
+    takes them from the inbox index, so it is not sorted in memory.
+    """
+    pulled = pulled_authors(user)
+    if not pulled:
+        return Post.objects.filter(timeline_entries__user=user).annotate(
+            feed_date=F("timeline_entries__pub_date"),
+            feed_post=F("timeline_entries__post"),
+        )
+    inbox = TimelineEntry.objects.filter(user=user).values("post")
+    return Post.objects.filter(
+        Q(id__in=inbox) | Q(author__in=pulled)
+    ).annotate(feed_date=F("pub_date"), feed_post=F("id"))
@@ -32,11 +32,21 @@ urlpatterns = [
         views.post_edit,
         name="post_edit",
     ),
+    path(
+        "posts/<int:post_id>/comments/",
+        views.post_comments,
+        name="post_comments",
+    ),
     path(
         "posts/<int:post_id>/comment/",
         views.add_comment,
         name="add_comment",
     ),
+    path(
+        "search/",
+        views.search,
+        name="search",
+    ),
     path(
         "follow/",
         views.follow_index,
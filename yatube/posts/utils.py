@@ -1,11 +1,163 @@
 """Utilities."""
 
+import json
+from functools import reduce
+from operator import or_
+
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+POST_ORDERING = ("-pub_date", "-id")
+COMMENT_ORDERING = ("created", "id")
+TIMELINE_ORDERING = ("-feed_date", "-feed_post")
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class CursorPaginator(Paginator):
+    """Paginator that seeks by the values of the ordering fields.
+
+    ``cursor_page`` never runs ``COUNT(*)`` or ``OFFSET``: each page is
+    read with a ``WHERE`` on the ordering key of the neighbouring row,
+    so the cost does not depend on how deep the page is. The numbered
+    pages of the parent class are still available through ``page`` and
+    ``get_page``.
+    """
+
+    def __init__(self, object_list, per_page, ordering=POST_ORDERING, **kw):
+        super().__init__(object_list.order_by(*ordering), per_page, **kw)
+        self.ordering = ordering
+        self.cursor_mode = False
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def cursor_page(self, cursor=None):
+        """Return the page that follows or precedes the cursor.
+
+        An empty or malformed cursor returns the first page.
+        """
+        self.cursor_mode = True
+        direction, values = self.decode_cursor(cursor)
+        ordering = self.ordering
+        object_list = self.object_list
+        if direction is not None:
+            object_list = object_list.filter(self._seek(direction, values))
+        if direction == PREVIOUS:
+            ordering = [_reverse(field) for field in ordering]
+        object_list = list(
+            object_list.order_by(*ordering)[: self.per_page + 1]
+        )
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[: self.per_page]
+        if direction == PREVIOUS:
+            object_list.reverse()
+        if object_list:
+            first, last = object_list[0], object_list[-1]
+            if direction == NEXT or (direction == PREVIOUS and has_more):
+                self.previous_cursor = self.encode_cursor(PREVIOUS, first)
+            if direction == PREVIOUS or has_more:
+                self.next_cursor = self.encode_cursor(NEXT, last)
+        return self._get_page(object_list, 1, self)
+
+    def encode_cursor(self, direction, obj):
+        """Make an opaque cursor from the ordering key of the object."""
+        values = [
+            _to_json(getattr(obj, field.lstrip("-")))
+            for field in self.ordering
+        ]
+        payload = json.dumps([direction, values])
+        return urlsafe_base64_encode(payload.encode())
+
+    def decode_cursor(self, cursor):
+        """Return the direction and key values stored in the cursor."""
+        if not cursor:
+            return None, None
+        try:
+            direction, values = json.loads(urlsafe_base64_decode(cursor))
+        except (TypeError, ValueError):
+            return None, None
+        if direction not in (NEXT, PREVIOUS) or not isinstance(values, list):
+            return None, None
+        if len(values) != len(self.ordering):
+            return None, None
+        try:
+            values = [
+                self._to_python(field.lstrip("-"), value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            return None, None
+        return direction, values
 
+    def _to_python(self, name, value):
+        """Convert the key value of the cursor like the ordering field."""
+        if value is None:
+            raise ValueError("Cursor key values are never null")
+        query = self.object_list.query
+        if name in query.annotations:
+            field = query.annotations[name].output_field
+        else:
+            field = self.object_list.model._meta.get_field(name)
+        return field.to_python(value)
 
-def paginator_func(request, post_list):
-    """Splitting data into multiple pages."""
-    paginator = Paginator(post_list, settings.NUM_POSTS)
+    def _seek(self, direction, values):
+        """Build the condition selecting rows beyond the key values."""
+        conditions = []
+        for position, field in enumerate(self.ordering):
+            name = field.lstrip("-")
+            descending = field.startswith("-") == (direction == NEXT)
+            lookup = "lt" if descending else "gt"
+            equal = {
+                other.lstrip("-"): value
+                for other, value in zip(
+                    self.ordering[:position], values[:position]
+                )
+            }
+            conditions.append(
+                Q(**equal, **{f"{name}__{lookup}": values[position]})
+            )
+        return reduce(or_, conditions)
+
+
+def _reverse(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _to_json(value):
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def paginator_func(request, post_list, count=None, ordering=POST_ORDERING):
+    """Splitting data into multiple pages.
+
+    Pages are addressed by the opaque ``cursor`` parameter, the
+    numbered ``page`` parameter is kept for compatibility. The number
+    of posts is taken from ``count`` when the caller knows it.
+    """
+    paginator = CursorPaginator(post_list, settings.NUM_POSTS, ordering)
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get("page")
-    return paginator.get_page(page_number)
+    if page_number is not None:
+        return paginator.get_page(page_number)
+    return paginator.cursor_page(request.GET.get("cursor"))
+
+
+def comments_page(request, comments):
+    """Page of comments to the post, the oldest first."""
+    paginator = CursorPaginator(
+        comments, settings.NUM_COMMENTS, COMMENT_ORDERING
+    )
+    return paginator.cursor_page(request.GET.get("cursor"))
+
+
+def search_page(request, results):
+    """Numbered page of the search results, ranked results have no keys."""
+    paginator = Paginator(results, settings.NUM_POSTS)
+    return paginator.get_page(request.GET.get("page"))
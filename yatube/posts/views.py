@@ -1,20 +1,35 @@
 """URLs request handlers of the 'Posts' application."""
 
-from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
 
+from posts import feeds, graph
+from posts.cache import (
+    AUTHOR,
+    GROUP,
+    POSTS,
+    cache_feed,
+    conditional,
+    post_detail_scopes,
+)
 from posts.forms import CommentForm, PostForm
 from posts.models import Follow, Group, Post, User
-from posts.utils import paginator_func
+from posts.search import SearchResults
+from posts.thumbnails import schedule_post
+from posts.utils import (
+    TIMELINE_ORDERING,
+    comments_page,
+    paginator_func,
+    search_page,
+)
 
 
-@cache_page(settings.CACHE_TIME, key_prefix="index_page")
+@cache_feed(POSTS)
 def index(request):
     """Main page."""
-    post_list = Post.objects.select_related("group", "author")
+    post_list = feeds.latest()
     page_obj = paginator_func(request, post_list)
+    graph.mark_followed(request.user, page_obj)
     context = {
         "page_obj": page_obj,
         "index": True,
@@ -22,11 +37,13 @@ def index(request):
     return render(request, "posts/index.html", context)
 
 
+@cache_feed(GROUP)
 def group_posts(request, slug):
     """Page of user posts filtered by groups."""
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related("group", "author")
-    page_obj = paginator_func(request, post_list)
+    post_list = feeds.of_group(group)
+    page_obj = paginator_func(request, post_list, group.posts_count)
+    graph.mark_followed(request.user, page_obj)
     context = {
         "group": group,
         "page_obj": page_obj,
@@ -34,15 +51,15 @@ def group_posts(request, slug):
     return render(request, "posts/group_list.html", context)
 
 
+@cache_feed(AUTHOR)
 def profile(request, username):
     """Page of user profile."""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related("group", "author")
-    page_obj = paginator_func(request, post_list)
-    following = (
-        request.user.is_authenticated
-        and Follow.objects.filter(user=request.user, author=author).exists()
+    author = get_object_or_404(
+        User.objects.select_related("profile"), username=username
     )
+    post_list = feeds.of_author(author)
+    page_obj = paginator_func(request, post_list, author.profile.posts_count)
+    following = graph.is_following(request.user, author)
     context = {
         "author": author,
         "page_obj": page_obj,
@@ -51,13 +68,14 @@ def profile(request, username):
     return render(request, "posts/profile.html", context)
 
 
+@conditional(post_detail_scopes, forms=True)
 def post_detail(request, post_id):
     """Page of single post."""
     post = get_object_or_404(
-        Post.objects.select_related("group", "author"), id=post_id
+        Post.objects.select_related("group", "author__profile"), id=post_id
     )
     form = CommentForm()
-    comments = post.comments.select_related("author")
+    comments = comments_page(request, post.comments.select_related("author"))
     context = {
         "post": post,
         "form": form,
@@ -66,6 +84,27 @@ def post_detail(request, post_id):
     return render(request, "posts/post_detail.html", context)
 
 
+def post_comments(request, post_id):
+    """Next page of comments to the post as an HTML fragment."""
+    post = get_object_or_404(Post, id=post_id)
+    comments = comments_page(request, post.comments.select_related("author"))
+    context = {
+        "post": post,
+        "comments": comments,
+    }
+    return render(request, "posts/includes/comments.html", context)
+
+
+def search(request):
+    """Posts found by the words of the query, the most relevant first."""
+    query = request.GET.get("q", "")
+    context = {
+        "query": query,
+        "page_obj": search_page(request, SearchResults(query)),
+    }
+    return render(request, "posts/search.html", context)
+
+
 @login_required
 def post_create(request):
     """Page for adding a new post."""
@@ -77,7 +116,8 @@ def post_create(request):
     if not form.is_valid():
         return render(request, "posts/create_post.html", context)
     form.instance.author = request.user
-    form.save()
+    post = form.save()
+    schedule_post(post)
     return redirect("posts:profile", username=request.user.username)
 
 
@@ -97,7 +137,7 @@ def post_edit(request, post_id):
         "is_edit": True,
     }
     if form.is_valid():
-        form.save()
+        schedule_post(form.save())
         return redirect("posts:post_detail", post_id=post_id)
     return render(request, "posts/create_post.html", context)
 
@@ -116,8 +156,9 @@ def add_comment(request, post_id):
 @login_required
 def follow_index(request):
     """Posts of authors to which the user is subscribed."""
-    post_list = Post.objects.filter(author__following__user=request.user)
-    page_obj = paginator_func(request, post_list)
+    post_list = feeds.of_followed(request.user)
+    page_obj = paginator_func(request, post_list, ordering=TIMELINE_ORDERING)
+    graph.mark_followed(request.user, page_obj)
     context = {
         "page_obj": page_obj,
         "follow": True,
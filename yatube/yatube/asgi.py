@@ -0,0 +1,22 @@
+"""
+ASGI config for yatube project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+Django 2.2 has no ASGI handler: the Django handler is served by
+``core.asgi.WSGIToASGI`` in a pool of ``ASGI_THREADS`` threads, e.g.
+``uvicorn yatube.asgi:application``.
+"""
+
+import os
+
+from django.conf import settings
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WSGIToASGI
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+
+application = WSGIToASGI(
+    get_wsgi_application(), max_workers=settings.ASGI_THREADS
+)
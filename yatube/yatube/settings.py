@@ -46,10 +46,13 @@ INSTALLED_APPS = [
     "users.apps.UsersConfig",
     "about.apps.AboutConfig",
     "core.apps.CoreConfig",
+    "api.apps.ApiConfig",
     "sorl.thumbnail",
 ]
 
 MIDDLEWARE = [
+    "core.middleware.RequestMetricsMiddleware",
+    "core.middleware.ReplicaMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -68,7 +71,7 @@ ROOT_URLCONF = "yatube.urls"
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "BACKEND": "core.template_backends.TimedDjangoTemplates",
         "DIRS": [TEMPLATES_DIR],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -85,6 +88,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "yatube.wsgi.application"
 
+# Threads running the views under ASGI, the connections themselves are
+# served by the event loop
+ASGI_THREADS = int(os.getenv("ASGI_THREADS", 16))
+
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
@@ -92,10 +99,50 @@ WSGI_APPLICATION = "yatube.wsgi.application"
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "NAME": os.getenv(
+            "DATABASE_FILE", os.path.join(BASE_DIR, "db.sqlite3")
+        ),
     }
 }
 
+# SQLITE_PROFILE=production keeps the connections of the primary open
+# between requests and sets SQLITE_PRAGMAS on every new connection
+# (core.signals): readers do not wait for writers in WAL mode, a writer
+# waits for the lock up to busy_timeout ms instead of failing at once.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "default")
+SQLITE_PRAGMAS = {}
+if SQLITE_PROFILE == "production":
+    DATABASES["default"]["CONN_MAX_AGE"] = 60
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,
+        "temp_store": "MEMORY",
+    }
+
+# Read replicas: copies of the database file made by the sync_replicas
+# command, listed in DATABASE_REPLICA_FILES separated by commas. Reads of
+# the pages of REPLICA_NAMESPACES go to a replica, a user who wrote reads
+# the primary during REPLICA_LAG seconds, the period of the copies.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+    filter(None, os.getenv("DATABASE_REPLICA_FILES", "").split(",")), 1
+):
+    # The connections to the replicas are not kept: a new copy of the file
+    # is seen by the next connection only
+    DATABASES[f"replica{number}"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": path,
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica{number}")
+DATABASE_ROUTERS = ["core.routers.ReplicaRouter"]
+REPLICA_NAMESPACES = ["posts"]
+REPLICA_LAG = 5
+REPLICA_COOKIE = "primary"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -139,11 +186,58 @@ STATICFILES_DIRS = [os.path.join(BASE_DIR, "static")]
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# The project serves MEDIA_URL itself unless SERVE_MEDIA=0, e.g. behind a
+# web server sending the files; browsers keep the files for MEDIA_MAX_AGE
+# seconds and the content-addressed post images for a year
+SERVE_MEDIA = os.getenv("SERVE_MEDIA", "1") == "1"
+MEDIA_MAX_AGE = 24 * 60 * 60
+
 
 # Constants
 
 NUM_POSTS = 5
+NUM_COMMENTS = 20
 NUM_CHAR = 15
+API_PAGE_SIZE = 20
+
+# Budgets of the views for a request of a signed-in user missing the
+# cache: the number of SQL queries and the latency in milliseconds. They
+# are measured with an image without cards on the feeds (one thumbnail
+# lookup) and the tasks of the writes run by the request (eager mode)
+VIEW_BUDGETS = {
+    "posts:index": {"queries": 5, "latency": 500},
+    "posts:group_list": {"queries": 6, "latency": 500},
+    "posts:profile": {"queries": 6, "latency": 500},
+    "posts:post_detail": {"queries": 6, "latency": 500},
+    "posts:post_comments": {"queries": 2, "latency": 500},
+    "posts:post_create": {"queries": 15, "latency": 500},
+    "posts:post_edit": {"queries": 15, "latency": 500},
+    "posts:add_comment": {"queries": 8, "latency": 500},
+    "posts:search": {"queries": 5, "latency": 500},
+    "posts:follow_index": {"queries": 5, "latency": 500},
+    "posts:profile_follow": {"queries": 14, "latency": 500},
+    "posts:profile_unfollow": {"queries": 11, "latency": 500},
+    "api:posts": {"queries": 3, "latency": 500},
+    "api:post": {"queries": 4, "latency": 500},
+    "api:comments": {"queries": 4, "latency": 500},
+    "api:groups": {"queries": 3, "latency": 500},
+    "api:group": {"queries": 3, "latency": 500},
+    "api:group_posts": {"queries": 4, "latency": 500},
+    "api:profile": {"queries": 4, "latency": 500},
+    "api:profile_posts": {"queries": 4, "latency": 500},
+    "api:follow": {"queries": 4, "latency": 500},
+    "api:follows": {"queries": 3, "latency": 500},
+    "media": {"queries": 0, "latency": 500},
+}
+
+# Home timeline: authors with more followers are pulled at read time
+TIMELINE_FANOUT_LIMIT = 1000
+TIMELINE_BACKFILL_LIMIT = 200
+TIMELINE_BATCH_SIZE = 500
+
+# Followed authors and follower counts of the users are cached for
+# FOLLOW_GRAPH_TIMEOUT seconds, the follows drop them earlier
+FOLLOW_GRAPH_TIMEOUT = 24 * 60 * 60
 
 LOGIN_URL = "users:login"
 LOGIN_REDIRECT_URL = "posts:index"
@@ -152,6 +246,38 @@ LOGOUT_URL = "users:logout"
 CSRF_FAILURE_VIEW = "core.views.csrf_failure"
 
 
+# Thumbnails of the post images are generated by the task queue,
+# pages show a placeholder until the thumbnail is ready
+
+THUMBNAIL_BACKEND = "posts.thumbnails.BackgroundThumbnailBackend"
+THUMBNAIL_ASYNC = True
+
+# Uploaded images are checked against the limits, stripped of metadata
+# and encoded again; the cards of the posts are cut in IMAGE_WIDTHS
+
+IMAGE_MAX_BYTES = 10 * 2**20
+IMAGE_MAX_PIXELS = 40 * 10**6
+IMAGE_MAX_WIDTH = 1920
+IMAGE_WIDTHS = (320, 640, 960)
+IMAGE_FORMAT = "WEBP"
+IMAGE_QUALITY = 80
+
+
+# Side effects of the writes are queued to the tasks table and run by
+# a thread of the web process ("thread"), by `manage.py run_tasks`
+# ("worker") or inline ("eager"); a failed task is retried after
+# TASKS_RETRY_DELAY seconds, doubled on every attempt; the test runner
+# runs them inline
+
+TASKS_MODE = os.getenv("TASKS_MODE", "thread")
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_LEASE = 300
+TASKS_BATCH_SIZE = 20
+
+TEST_RUNNER = "core.testing.TestRunner"
+
+
 # To emulate a mail server
 
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
@@ -159,13 +285,41 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 
 # Caching backend
-
-CACHES = {
-    "default": {
+# CACHE_BACKEND selects the cache of the worker processes:
+# "locmem" - a separate cache in every process,
+# "file", "sqlite" - a cache shared by the processes of one host,
+# "memcached" - a memcached server at CACHE_LOCATION (needs python-memcached)
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")
+CACHE_BACKENDS = {
+    "locmem": {
         "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-    }
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "sqlite": {
+        "BACKEND": "core.cache_backends.SQLiteCache",
+        "LOCATION": os.path.join(BASE_DIR, "cache.sqlite3"),
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+    "memcached": {
+        "BACKEND": "django.core.cache.backends.memcached.MemcachedCache",
+        "LOCATION": "127.0.0.1:11211",
+    },
 }
-CACHE_TIME = 20
+CACHES = {"default": dict(CACHE_BACKENDS[CACHE_BACKEND])}
+if os.getenv("CACHE_LOCATION"):
+    CACHES["default"]["LOCATION"] = os.getenv("CACHE_LOCATION")
+# Feed pages are invalidated by generations (posts.cache) and never expire,
+# after FEED_CACHE_REFRESH seconds one request may recompute them early
+FEED_CACHE_TIMEOUT = None
+FEED_CACHE_REFRESH = 600
+FEED_CACHE_BETA = 1.0
+FEED_CACHE_LOCK_TIMEOUT = 10
 
 # Debug mode settings
 if DEBUG: